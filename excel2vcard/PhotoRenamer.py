@@ -1,21 +1,41 @@
 import os
 import sys
 import datetime
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import exifread
 import piexif
 import pillow_heif
 import ttkbootstrap as ttk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, font, messagebox
 from tkinterdnd2 import DND_FILES, TkinterDnD
 from threading import Thread
 import logging
 import re
+import sqlite3
+import photo_meta
+from photo_cache import MetadataCache
+from rename_plan import RenameJournal, apply_plan, find_incomplete_journal, latest_journal, plan_renames, resume, undo
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='rename_tool.log')
 
 DATE_FORMAT = "%Y%m%d_%H%M%S"
+# 读取日期主要耗在I/O（NAS上尤其明显），用线程池并发读取
+METADATA_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# 拍摄日期缓存，文件大小和修改时间都没变时不再读取文件内容
+CACHE_FILE = 'rename_cache.db'
+CACHE_FLUSH_INTERVAL = 1000
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif', '.heic')
+# 后台扫描文件夹时每批交给界面的文件数，以及界面取批次的间隔（毫秒）
+INGEST_BATCH = 2000
+INGEST_POLL_MS = 100
 stop_requested = False
+# 重命名、预览和撤销同一时间只能进行一个，只在界面线程中读写
 renaming_in_progress = False
+ingest_queue = queue.Queue()
+# 后台线程不直接操作控件：把(函数, 参数)放入队列，由界面线程的poll_ui_queue依次调用
+ui_queue = queue.Queue()
 
 COMMON_DATE_FORMATS = [
     "%Y%m%d_%H%M%S",    # 20230729_141530
@@ -30,7 +50,8 @@ COMMON_DATE_FORMATS = [
 def get_exif_date(file_path):
     try:
         with open(file_path, 'rb') as f:
-            tags = exifread.process_file(f)
+            # 只需要拍摄日期：不解析MakerNote和缩略图，读到DateTimeOriginal就停止
+            tags = exifread.process_file(f, details=False, stop_tag='DateTimeOriginal')
             if 'EXIF DateTimeOriginal' in tags:
                 date_str = str(tags['EXIF DateTimeOriginal'])
                 return datetime.datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
@@ -57,78 +78,309 @@ def get_file_modification_date(file_path):
         logging.error(f"获取文件修改日期失败: {file_path}, 错误: {e}")
     return None
 
-def generate_unique_filename(directory, base_name, ext, original_filename):
-    new_filename = f"{base_name}{ext}"
-    new_file_path = os.path.join(directory, new_filename)
-    if new_file_path.lower() == original_filename.lower():
-        return new_file_path
-    counter = 1
-    while os.path.exists(new_file_path):
-        new_filename = f"{base_name}_{counter}{ext}"
-        new_file_path = os.path.join(directory, new_filename)
-        counter += 1
-    return new_file_path
-
-def rename_photos(files_listbox, progress_var):
-    global stop_requested, renaming_in_progress
-    
+def read_capture_date(file_path):
+    # 先只读文件头取拍摄日期，格式不支持或解析失败时再用exifread/pillow_heif，都没有时用文件修改日期
+    # 返回(日期, 来源)，来源为'exif'或'mtime'
+    try:
+        date_time = photo_meta.read_capture_date(file_path)
+    except Exception as e:
+        # 与原来的exifread/pillow_heif读取一样，任何解析错误都不能中断整批重命名
+        logging.debug(f"读取文件头失败，改用完整解析: {file_path}, 错误: {e}")
+        if file_path.lower().endswith('.heic'):
+            date_time = get_heic_date(file_path)
+        else:
+            date_time = get_exif_date(file_path)
+    if date_time:
+        return date_time, 'exif'
+    return get_file_modification_date(file_path), 'mtime'
+
+def get_capture_date(file_path, cache=None):
+    if cache is None:
+        return read_capture_date(file_path)[0]
+    try:
+        stat = os.stat(file_path)
+    except OSError as e:
+        logging.error(f"获取文件信息失败: {file_path}, 错误: {e}")
+        return None
+    cached = cache.get(file_path, stat.st_size, stat.st_mtime_ns)
+    if cached is not None:
+        return cached[0]
+    date_time, source = read_capture_date(file_path)
+    if date_time:
+        cache.put(file_path, stat.st_size, stat.st_mtime_ns, date_time, source)
+    return date_time
+
+def iter_capture_dates(file_paths, cache=None, workers=METADATA_WORKERS):
+    """用线程池并发读取日期，按file_paths的顺序生成(路径, 日期)
+    同时排队的任务不超过workers的4倍；stop_requested后不再提交新任务，排队中的任务直接取消"""
+    paths = iter(file_paths)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while len(pending) < workers * 4 and not stop_requested:
+                file_path = next(paths, None)
+                if file_path is None:
+                    break
+                pending.append((file_path, executor.submit(get_capture_date, file_path, cache)))
+            if not pending or stop_requested:
+                return
+            file_path, future = pending.popleft()
+            yield file_path, future.result()
+    finally:
+        # 不等待正在读取的文件，停止立即生效
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def post(func, *args):
+    # 后台线程调用：交给界面线程执行func(*args)
+    ui_queue.put((func, args))
+
+def read_dates(file_paths, cache):
+    """并发读取日期（进度条前一半），返回按file_paths顺序的[(路径, 日期), ...]，停止时只返回已读取的部分"""
+    items = []
+    reported = 0
+    for done, item in enumerate(iter_capture_dates(file_paths, cache), 1):
+        items.append(item)
+        # 进度每变化1%才交给界面，十万个文件也不会塞满队列
+        progress = done * 50 // len(file_paths)
+        if progress > reported:
+            reported = progress
+            post(progress_var.set, progress)
+        if cache is not None and done % CACHE_FLUSH_INTERVAL == 0:
+            cache.flush()
+    return items
+
+def open_cache():
+    try:
+        return MetadataCache(CACHE_FILE)
+    except sqlite3.Error as e:
+        logging.error(f"打开缓存失败: {CACHE_FILE}, 错误: {e}")
+        return None
+
+def close_cache(cache):
+    if cache is None:
+        return
+    try:
+        cache.compact()
+    except sqlite3.Error as e:
+        logging.error(f"整理缓存失败: {CACHE_FILE}, 错误: {e}")
+    finally:
+        cache.close()
+
+def pending_entries(files_listbox):
+    # 已经重命名过的行（"旧路径" 重命名为 "新路径"）跳过
+    return [entry for entry in files_listbox.get(0, ttk.END) if not entry.startswith('"')]
+
+def begin_task():
+    """界面线程：开始重命名、预览或撤销前调用，已有任务在进行时提示并返回False"""
+    global renaming_in_progress
     if renaming_in_progress:
         messagebox.showwarning("重命名进行中", "重命名操作已在进行中，请稍后再试。")
-        return
-
+        return False
     renaming_in_progress = True
     start_button.config(state=ttk.DISABLED)
+    preview_button.config(state=ttk.DISABLED)
+    undo_button.config(state=ttk.DISABLED)
     stop_button.config(state=ttk.NORMAL)
+    return True
 
-    processed_files = set()
-    total_files = files_listbox.size()
-    for i in range(total_files):
-        if stop_requested:
-            stop_requested = False
-            messagebox.showinfo("重命名停止", "重命名操作已停止。")
-            break
-        file_path = files_listbox.get(i).strip('"')
-        if file_path not in processed_files:
-            renamed = rename_photo(file_path, files_listbox, progress_var, total_files, i)
-            if renamed:
-                processed_files.add(file_path)
-                files_listbox.delete(i)
-                files_listbox.insert(ttk.END, f'"{file_path}" 重命名为 "{renamed}"')
-            if auto_scroll_var.get():
-                files_listbox.see(ttk.END)
-    messagebox.showinfo("重命名完成", f"成功重命名 {len(processed_files)} 个文件。")
-
+def end_task():
+    # 界面线程：任务结束（包括出错）后恢复状态，否则只能重启程序才能再次重命名
+    global stop_requested, renaming_in_progress
+    stop_requested = False
     renaming_in_progress = False
     start_button.config(state=ttk.NORMAL)
+    preview_button.config(state=ttk.NORMAL)
+    undo_button.config(state=ttk.NORMAL)
     stop_button.config(state=ttk.DISABLED)
 
-def rename_photo(file_path, files_listbox, progress_var, total_files, current_index):
-    filename = os.path.basename(file_path)
-    date_time = get_heic_date(file_path) if filename.lower().endswith('.heic') else get_exif_date(file_path)
-    if not date_time:
-        date_time = get_file_modification_date(file_path)
-    if date_time:
-        base_name = date_time.strftime(DATE_FORMAT)
-        ext = os.path.splitext(filename)[1]
-        directory = os.path.dirname(file_path)
-        new_file_path = generate_unique_filename(directory, base_name, ext, file_path)
-        if new_file_path != file_path:
+def start_rename():
+    # 界面线程：询问是否继续上次的计划、取出待重命名的行，再交给后台线程
+    if not begin_task():
+        return
+    journal_path = find_incomplete_journal()
+    if journal_path and not messagebox.askyesno("继续重命名", f"上次重命名没有完成，是否继续？\n{journal_path}"):
+        journal_path = None
+    Thread(target=rename_photos, args=(pending_entries(files_listbox), journal_path), daemon=True).start()
+
+def start_preview():
+    if begin_task():
+        Thread(target=preview_renames, args=(pending_entries(files_listbox),), daemon=True).start()
+
+def rename_photos(entries, journal_path=None):
+    """后台线程：journal_path不为None时继续执行该日志中的计划，否则为entries读取日期、生成计划并执行"""
+    cache = None
+    messages = []
+    try:
+        cache = open_cache()
+
+        def on_renamed(index, old_path, new_path):
+            # 继续执行和新计划都要同步缓存中的路径和列表中的行
+            if cache is not None:
+                cache.rename(old_path, new_path)
+            post(mark_renamed, old_path, new_path, 50 + (index + 1) * 50 / len(plan))
+
+        if journal_path:
+            plan = RenameJournal(journal_path).load()[0]
+            renamed_count = resume(journal_path, on_renamed, lambda: stop_requested)
+        else:
+            # 先并发读取全部日期，再一次性生成重命名计划，最后按计划逐个执行
+            plan = plan_renames(read_dates(entries, cache), DATE_FORMAT)
+            renamed_count = 0
+            if plan and not stop_requested:
+                _, renamed_count = apply_plan(plan, on_renamed, lambda: stop_requested)
+        # 排在已改名的行之后，进度条不会被还没取出的更新拉回去
+        post(progress_var.set, 100)
+        if stop_requested:
+            messages.append((messagebox.showinfo, "重命名停止", "重命名操作已停止。"))
+        messages.append((messagebox.showinfo, "重命名完成", f"成功重命名 {renamed_count} 个文件。"))
+    except Exception as e:
+        logging.exception(f"重命名出错: {e}")
+        messages.append((messagebox.showerror, "重命名出错", f"重命名过程中出错，已停止：\n{e}"))
+    finally:
+        close_cache(cache)
+        post(end_task)
+    for func, *args in messages:
+        post(func, *args)
+
+def preview_renames(entries):
+    # 后台线程：只读取日期、生成计划，不改动任何文件
+    cache = open_cache()
+    try:
+        plan = plan_renames(read_dates(entries, cache), DATE_FORMAT)
+    finally:
+        close_cache(cache)
+        post(progress_var.set, 0)
+        post(end_task)
+    post(show_preview, plan)
+
+def show_preview(plan):
+    preview_window = ttk.Toplevel(root)
+    preview_window.title(f"重命名预览（共 {len(plan)} 个文件）")
+    # 计划可能有几十万行，与文件列表一样只显示可见的行
+    preview_listbox = VirtualListbox(preview_window, width=120, height=25)
+    preview_listbox.pack(fill=ttk.BOTH, expand=True, padx=10, pady=10)
+    preview_listbox.insert(ttk.END, *(f'"{old_path}" -> "{os.path.basename(new_path)}"' for old_path, new_path in plan))
+
+def undo_last_rename():
+    # 界面线程：确认后交给后台线程撤销；重命名进行中或上次没有执行完的日志都不能撤销
+    if renaming_in_progress:
+        messagebox.showwarning("重命名进行中", "重命名操作正在进行中，结束后才能撤销。")
+        return
+    journal_path = latest_journal()
+    if journal_path is None:
+        messagebox.showinfo("撤销重命名", "没有可以撤销的重命名。")
+        return
+    plan, _, ended = RenameJournal(journal_path).load()
+    if not ended:
+        messagebox.showwarning("撤销重命名", f"上次重命名没有完成，请先点击“开始重命名”继续执行，再撤销。\n{journal_path}")
+        return
+    if messagebox.askyesno("撤销重命名", f"撤销最近一次重命名？\n{journal_path}") and begin_task():
+        Thread(target=undo_renames, args=(journal_path, len(plan)), daemon=True).start()
+
+def undo_renames(journal_path, total):
+    # 后台线程：按日志改回文件名，同步缓存中的路径和列表中的行
+    cache = None
+    messages = []
+    try:
+        cache = open_cache()
+
+        def on_restored(index, old_path, new_path):
+            if cache is not None:
+                cache.rename(new_path, old_path)
+            post(mark_restored, old_path, new_path, (total - index) * 100 / total)
+
+        restored = undo(journal_path, on_restored, lambda: stop_requested)
+        post(progress_var.set, 100)
+        messages.append((messagebox.showinfo, "撤销重命名", f"已改回 {restored} 个文件。"))
+    except Exception as e:
+        logging.exception(f"撤销出错: {e}")
+        messages.append((messagebox.showerror, "撤销出错", f"撤销过程中出错，已停止：\n{e}"))
+    finally:
+        close_cache(cache)
+        post(end_task)
+    for func, *args in messages:
+        post(func, *args)
+
+def iter_photo_files(paths):
+    """展开文件和文件夹：文件夹用os.scandir递归查找支持的图片，同一文件夹中先文件后子文件夹，按名称排序"""
+    stack = list(reversed(paths))
+    while stack:
+        path = stack.pop()
+        if not os.path.isdir(path):
+            if path.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield path
+            continue
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logging.error(f"读取文件夹失败: {path}, 错误: {e}")
+            continue
+        subdirectories = []
+        for entry in entries:
             try:
-                os.rename(file_path, new_file_path)
-                logging.info(f'重命名成功: "{file_path}" 重命名为 "{new_file_path}"')
-                progress_var.set((current_index + 1) * 100 / total_files)
-                return new_file_path
-            except Exception as e:
-                logging.error(f"重命名失败: {file_path}, 错误: {e}")
-    progress_var.set((current_index + 1) * 100 / total_files)
-    return False
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield entry.path
+            except OSError as e:
+                logging.error(f"读取文件信息失败: {entry.path}, 错误: {e}")
+        stack.extend(reversed(subdirectories))
+
+def scan_paths(paths):
+    # 后台线程：展开文件夹，每INGEST_BATCH个文件放入队列，由界面线程取出
+    batch = []
+    for path in iter_photo_files(paths):
+        batch.append(path)
+        if len(batch) >= INGEST_BATCH:
+            ingest_queue.put(batch)
+            batch = []
+    if batch:
+        ingest_queue.put(batch)
+
+def add_paths(paths):
+    Thread(target=scan_paths, args=(list(paths),), daemon=True).start()
+
+def poll_ingest():
+    # 界面线程：把扫描到的文件分批加入列表，每次最多处理几批，不阻塞界面
+    for _ in range(5):
+        try:
+            batch = ingest_queue.get_nowait()
+        except queue.Empty:
+            break
+        files_listbox.add_paths(batch)
+    root.after(INGEST_POLL_MS, poll_ingest)
+
+def mark_renamed(old_path, new_path, progress_value):
+    # 界面线程：按路径找到对应的行改为重命名结果，期间增删过行也不会改错
+    index = files_listbox.replace(old_path, f'"{old_path}" 重命名为 "{new_path}"')
+    if index is not None and auto_scroll_var.get():
+        files_listbox.see(index)
+    progress_var.set(progress_value)
+
+def mark_restored(old_path, new_path, progress_value):
+    # 界面线程：重命名结果的行改回原路径；列表中是新路径时也改回
+    index = files_listbox.replace(f'"{old_path}" 重命名为 "{new_path}"', old_path)
+    if index is None:
+        index = files_listbox.replace(new_path, old_path)
+    if index is not None and auto_scroll_var.get():
+        files_listbox.see(index)
+    progress_var.set(progress_value)
+
+def poll_ui_queue():
+    # 界面线程：依次执行后台线程交来的界面操作
+    while True:
+        try:
+            func, args = ui_queue.get_nowait()
+        except queue.Empty:
+            break
+        func(*args)
+    root.after(INGEST_POLL_MS, poll_ui_queue)
 
 def on_drop(event, files_listbox):
     paths = re.findall(r'(?<=\{)[^{}]*(?=\})|[^{}\s]+', event.data)
-    for path in paths:
-        path = path.strip().strip('{}')
-        if path.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif', '.heic')) and path not in files_listbox.get(0, ttk.END):
-            files_listbox.insert(ttk.END, path)
+    add_paths(path.strip().strip('{}') for path in paths)
 
 def open_file(event):
     selected_index = files_listbox.curselection()
@@ -188,9 +440,163 @@ def save_settings(date_format):
 
 def select_files(files_listbox):
     file_paths = filedialog.askopenfilenames(filetypes=[("Image files", "*.png *.jpg *.jpeg *.tiff *.bmp *.gif *.heic")])
-    for file_path in file_paths:
-        if file_path not in files_listbox.get(0, ttk.END):
-            files_listbox.insert(ttk.END, file_path)
+    files_listbox.add_paths(file_paths)
+
+def select_folder():
+    directory = filedialog.askdirectory()
+    if directory:
+        add_paths([directory])
+
+class VirtualListbox(ttk.Frame):
+    """文件列表：数据保存在Python列表中，Listbox只显示可见的几十行，滚动时替换显示内容，
+    十万个文件也不会拖慢界面；另用字典记录每行所在位置，查重和按内容找行都是O(1)。接口与Listbox的常用方法一致
+    只能在界面线程中调用"""
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master)
+        self.items = []
+        self.positions = {}  # 行内容 -> 位置，_stale之后的行位置可能已过期
+        self._stale = 0
+        self.selected = set()
+        self.top = 0
+        self._refresh_pending = False
+        self.listbox = ttk.tk.Listbox(self, exportselection=False, **kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient=ttk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=ttk.RIGHT, fill=ttk.Y)
+        self.listbox.pack(side=ttk.LEFT, fill=ttk.BOTH, expand=True)
+        # Listbox每行高度为字体行距 + 1 + 两倍选中边框宽度
+        self.line_height = (font.Font(font=self.listbox.cget('font')).metrics('linespace') + 1
+                            + 2 * int(self.listbox.cget('selectborderwidth')))
+        self.listbox.bind('<Configure>', lambda event: self.refresh())
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<MouseWheel>', lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+        # 方向键在可见范围外时需要滚动数据，不交给Listbox处理
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+
+    def _visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.line_height)
+
+    def refresh(self):
+        self._refresh_pending = False
+        rows = self._visible_rows()
+        self.top = max(0, min(self.top, len(self.items) - rows))
+        self.listbox.delete(0, ttk.END)
+        self.listbox.insert(ttk.END, *self.items[self.top:self.top + rows + 1])
+        for index in self.selected:
+            if self.top <= index <= self.top + rows:
+                self.listbox.selection_set(index - self.top)
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items), min(1, (self.top + rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _schedule_refresh(self):
+        # 多次修改合并为一次重绘
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        rows = self._visible_rows()
+        if action == 'moveto':
+            self.top = int(float(amount) * len(self.items))
+        elif unit == 'pages':
+            self.top += int(amount) * rows
+        else:
+            self.top += int(amount)
+        self.refresh()
+
+    def _on_select(self, event):
+        self.selected = {self.top + index for index in self.listbox.curselection()}
+
+    def _move_selection(self, step):
+        if self.items:
+            current = min(self.selected) if self.selected else self.top - step
+            index = max(0, min(len(self.items) - 1, current + step))
+            self.selected = {index}
+            self.see(index)
+        return 'break'
+
+    def _index(self, index):
+        return len(self.items) if index == ttk.END else index
+
+    def size(self):
+        return len(self.items)
+
+    def get(self, first, last=None):
+        if last is None:
+            return self.items[self._index(first)]
+        return tuple(self.items[self._index(first):self._index(last) + 1])
+
+    def insert(self, index, *elements):
+        index = self._index(index)
+        self.items[index:index] = elements
+        self._stale = min(self._stale, index)
+        self.selected = {i + len(elements) if i >= index else i for i in self.selected}
+        self._schedule_refresh()
+
+    def delete(self, first, last=None):
+        first = self._index(first)
+        last = first if last is None else self._index(last)
+        removed = self.items[first:last + 1]
+        del self.items[first:last + 1]
+        for element in removed:
+            self.positions.pop(element, None)
+        self._stale = min(self._stale, first)
+        self.selected = {i - len(removed) if i > last else i for i in self.selected if not first <= i <= last}
+        self._schedule_refresh()
+
+    def _reindex(self):
+        # 增删行后只记下最早变动的位置，用到时再一次性更新，连续删除多行不会每次都重算
+        for index in range(self._stale, len(self.items)):
+            self.positions[self.items[index]] = index
+        self._stale = len(self.items)
+
+    def replace(self, old_element, new_element):
+        """把内容为old_element的行改为new_element，返回该行位置；行已被删除时返回None"""
+        self._reindex()
+        index = self.positions.pop(old_element, None)
+        if index is None:
+            return None
+        self.items[index] = new_element
+        self.positions[new_element] = index
+        self._schedule_refresh()
+        return index
+
+    def add_paths(self, paths):
+        """把不在列表中的路径追加到末尾，返回新加入的数量"""
+        self._reindex()
+        new_paths = []
+        for path in paths:
+            if path not in self.positions:
+                self.positions[path] = len(self.items) + len(new_paths)
+                new_paths.append(path)
+        self.items.extend(new_paths)
+        self._stale = len(self.items)
+        if new_paths and auto_scroll_var.get():
+            self.top = len(self.items)
+        self._schedule_refresh()
+        return len(new_paths)
+
+    def see(self, index):
+        rows = self._visible_rows()
+        index = self._index(index)
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + rows:
+            self.top = index - rows + 1
+        self._schedule_refresh()
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
 
 root = TkinterDnD.Tk()
 root.title("照片重命名工具")
@@ -204,15 +610,15 @@ auto_scroll_var = ttk.BooleanVar()
 main_frame = ttk.Frame(root)
 main_frame.pack(fill=ttk.BOTH, expand=True)
 
-label_description = ttk.Label(main_frame, text="将文件拖拽至此处添加至重命名列表，双击打开文件，右键移除文件")
+label_description = ttk.Label(main_frame, text="将文件或文件夹拖拽至此处添加至重命名列表，双击打开文件，右键移除文件")
 label_description.pack(fill=ttk.X, padx=10, pady=10)
 
-files_listbox = ttk.tk.Listbox(main_frame, width=100, height=15)
+files_listbox = VirtualListbox(main_frame, width=100, height=15)
 files_listbox.pack(fill=ttk.BOTH, expand=True, padx=10, pady=10)
-files_listbox.drop_target_register(DND_FILES)
-files_listbox.dnd_bind('<<Drop>>', lambda e: on_drop(e, files_listbox))
-files_listbox.bind('<Double-1>', open_file)
-files_listbox.bind('<Button-3>', remove_file)
+files_listbox.listbox.drop_target_register(DND_FILES)
+files_listbox.listbox.dnd_bind('<<Drop>>', lambda e: on_drop(e, files_listbox))
+files_listbox.listbox.bind('<Double-1>', open_file)
+files_listbox.listbox.bind('<Button-3>', remove_file)
 
 progress_var = ttk.DoubleVar()
 progress = ttk.Progressbar(main_frame, variable=progress_var, maximum=100)
@@ -221,7 +627,7 @@ progress.pack(fill=ttk.X, padx=10, pady=10)
 button_frame = ttk.Frame(main_frame)
 button_frame.pack(fill=ttk.X, padx=10, pady=10)
 
-start_button = ttk.Button(button_frame, text="开始重命名", command=lambda: Thread(target=rename_photos, args=(files_listbox, progress_var)).start())
+start_button = ttk.Button(button_frame, text="开始重命名", command=start_rename)
 start_button.pack(side=ttk.LEFT, padx=5)
 start_button.config(state=ttk.NORMAL)
 
@@ -229,6 +635,12 @@ stop_button = ttk.Button(button_frame, text="停止重命名", command=stop_rena
 stop_button.pack(side=ttk.LEFT, padx=5)
 stop_button.config(state=ttk.DISABLED)
 
+preview_button = ttk.Button(button_frame, text="预览", command=start_preview)
+preview_button.pack(side=ttk.LEFT, padx=5)
+
+undo_button = ttk.Button(button_frame, text="撤销上次重命名", command=undo_last_rename)
+undo_button.pack(side=ttk.LEFT, padx=5)
+
 settings_button = ttk.Button(button_frame, text="设置", command=open_settings)
 settings_button.pack(side=ttk.LEFT, padx=5)
 
@@ -238,7 +650,12 @@ clear_button.pack(side=ttk.LEFT, padx=5)
 select_files_button = ttk.Button(button_frame, text="添加文件", command=lambda: select_files(files_listbox))
 select_files_button.pack(side=ttk.LEFT, padx=5)
 
+select_folder_button = ttk.Button(button_frame, text="添加文件夹", command=select_folder)
+select_folder_button.pack(side=ttk.LEFT, padx=5)
+
 auto_scroll_checkbox = ttk.Checkbutton(button_frame, text="自动滚动", variable=auto_scroll_var)
 auto_scroll_checkbox.pack(side=ttk.LEFT, padx=5)
 
+root.after(INGEST_POLL_MS, poll_ingest)
+root.after(INGEST_POLL_MS, poll_ui_queue)
 root.mainloop()
@@ -0,0 +1,184 @@
+import argparse
+import csv
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import excel2vcard
+import vcard2excel
+
+# VCF按字节范围拆分任务，每个任务大约处理的字节数
+CHUNK_BYTES = 16 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _run_tasks(function, tasks, workers):
+    # 按任务顺序返回结果；只有一个进程时不启动进程池
+    if workers == 1 or len(tasks) <= 1:
+        return [function(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, *zip(*tasks)))
+
+def _shard_path(path, number):
+    # contacts.vcf -> contacts_001.vcf
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_{number:03d}{extension}"
+
+def _convert_sheet(excel_file, sheet, chunk_path):
+    # 子进程：把一个工作表转换成vCard分块文件，返回联系人数
+    try:
+        rows = excel2vcard.read_contact_rows(excel_file, sheet)
+    except KeyError as e:
+        logging.warning(f"跳过 {excel_file} 的工作表 {sheet}: {e}")
+        open(chunk_path, 'w').close()
+        return 0
+    with open(chunk_path, 'w', encoding='utf-8', buffering=excel2vcard.WRITE_BUFFER_SIZE) as f:
+        return excel2vcard.write_vcards(rows, f)
+
+def _merge_vcards(chunk_paths, output_file, shard_size=None):
+    # 按顺序合并分块；指定shard_size时每shard_size个联系人一个文件，返回输出文件列表
+    if not shard_size:
+        with open(output_file, 'wb') as output:
+            for chunk_path in chunk_paths:
+                with open(chunk_path, 'rb') as chunk:
+                    while True:
+                        data = chunk.read(COPY_BUFFER_SIZE)
+                        if not data:
+                            break
+                        output.write(data)
+        return [output_file]
+
+    outputs = []
+    output = None
+    count = 0
+    try:
+        for chunk_path in chunk_paths:
+            with open(chunk_path, 'rb') as chunk:
+                for line in chunk:
+                    if output is None:
+                        outputs.append(_shard_path(output_file, len(outputs) + 1))
+                        output = open(outputs[-1], 'wb')
+                    output.write(line)
+                    if line.rstrip(b'\r\n').upper() == b'END:VCARD':
+                        count += 1
+                        if count % shard_size == 0:
+                            output.close()
+                            output = None
+    finally:
+        if output is not None:
+            output.close()
+    return outputs
+
+def excel_files_to_vcard(excel_files, output_dir, shard_size=None, workers=None):
+    """把多个Excel文件的所有工作表并行转换成vCard，按文件和工作表顺序合并为contacts.vcf，
+    或按shard_size拆成contacts_001.vcf等多个文件；结果与单进程逐个转换一致"""
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        sheets = [(excel_file, sheet) for excel_file in excel_files for sheet in excel2vcard.list_sheets(excel_file)]
+        tasks = [(excel_file, sheet, os.path.join(temp_dir, f"{number}.vcf"))
+                 for number, (excel_file, sheet) in enumerate(sheets)]
+        counts = _run_tasks(_convert_sheet, tasks, workers or os.cpu_count())
+        outputs = _merge_vcards([task[2] for task in tasks], os.path.join(output_dir, "contacts.vcf"), shard_size)
+    logging.info(f"转换完成，{len(tasks)} 个工作表共 {sum(counts)} 个联系人，用时 {time.perf_counter() - start:.1f} 秒，"
+                 f"输出 {len(outputs)} 个文件")
+    return outputs
+
+def split_vcf(vcf_file, chunk_bytes=CHUNK_BYTES):
+    """按字节数把VCF拆成[(文件, 起始, 结束), ...]，每段从其中第一个BEGIN:VCARD开始"""
+    size = os.path.getsize(vcf_file)
+    bounds = list(range(0, size, chunk_bytes)) + [size]
+    return [(vcf_file, start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+def iter_lines_in_range(vcf_file, start, end):
+    """生成BEGIN:VCARD行首位置落在[start, end)内的联系人的所有行，相邻范围既不重复也不遗漏"""
+    with open(vcf_file, 'rb') as f:
+        if start:
+            # 对齐到start处或之后的第一个行首
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        started = False
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if line[:11].upper() == b'BEGIN:VCARD':
+                if position >= end:
+                    return
+                started = True
+            if started:
+                yield line
+            position += len(line)
+
+def _convert_range(vcf_file, start, end, chunk_path):
+    # 子进程：把VCF的一段解析成CSV分块，返回联系人数
+    return vcard2excel.write_csv(vcard2excel.iter_contacts(iter_lines_in_range(vcf_file, start, end)), chunk_path)
+
+def _read_chunks(chunk_paths):
+    # 按顺序读回CSV分块中的联系人
+    for chunk_path in chunk_paths:
+        with open(chunk_path, encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                yield dict(zip(vcard2excel.COLUMNS, row))
+
+def vcf_files_to_excel(vcf_files, output_file, shard_size=None, workers=None, chunk_bytes=CHUNK_BYTES):
+    """把多个VCF按字节范围并行解析，按顺序写入一个xlsx/csv，或按shard_size拆成多个文件；
+    结果与单进程逐个转换一致"""
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    os.makedirs(output_dir, exist_ok=True)
+    write = vcard2excel.output_writer(output_file)
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        ranges = [task for vcf_file in vcf_files for task in split_vcf(vcf_file, chunk_bytes)]
+        tasks = [task + (os.path.join(temp_dir, f"{number}.csv"),) for number, task in enumerate(ranges)]
+        counts = _run_tasks(_convert_range, tasks, workers or os.cpu_count())
+        contacts = _read_chunks([task[3] for task in tasks])
+        if not shard_size:
+            write(contacts, output_file)
+            outputs = [output_file]
+        else:
+            outputs = []
+            while True:
+                shard = list(itertools.islice(contacts, shard_size))
+                if not shard:
+                    break
+                outputs.append(_shard_path(output_file, len(outputs) + 1))
+                write(shard, outputs[-1])
+    logging.info(f"转换完成，共 {sum(counts)} 个联系人，用时 {time.perf_counter() - start:.1f} 秒，输出 {len(outputs)} 个文件")
+    return outputs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多进程批量转换联系人")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    vcard_parser = subparsers.add_parser('to-vcard', help="Excel -> vCard，转换所有文件的所有工作表")
+    vcard_parser.add_argument('inputs', nargs='+', help="xlsx/xls文件")
+    vcard_parser.add_argument('-o', '--output-dir', default='.', help="输出目录")
+    excel_parser = subparsers.add_parser('to-excel', help="vCard -> Excel/CSV")
+    excel_parser.add_argument('inputs', nargs='+', help="vcf文件")
+    excel_parser.add_argument('-o', '--output', default='contacts.xlsx', help="输出文件，扩展名为.xlsx时输出xlsx，否则输出CSV")
+    for subparser in (vcard_parser, excel_parser):
+        subparser.add_argument('--shard-size', type=int, default=None, help="每个输出文件最多的联系人数，默认不拆分")
+        subparser.add_argument('--workers', type=int, default=None, help="进程数，默认CPU核数")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'to-vcard':
+            outputs = excel_files_to_vcard(args.inputs, args.output_dir, args.shard_size, args.workers)
+        else:
+            outputs = vcf_files_to_excel(args.inputs, args.output, args.shard_size, args.workers)
+    except (OSError, zipfile.BadZipFile) as e:
+        logging.error(f"转换失败: {e}")
+        return 1
+    for output in outputs:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIZES = (1000, 10000, 100000, 1000000)
+FAMILY_NAMES = ['王', '李', '张', '刘', '陈', '欧阳', 'Smith', 'O\'Brien', None]
+GIVEN_NAMES = ['伟', '芳', '娜', '秀英', '敏', 'John', 'Mary-Ann', '小明,小红', '分号;测试', '反斜杠\\']
+# vobject兼容模式太慢，只测小规模
+VOBJECT_MAX_SIZE = 10000
+
+def _phone(rng):
+    # 各种写法的手机号：整数、带.0的浮点数、带国家码和分隔符的字符串、空值
+    number = 13000000000 + rng.randrange(10 ** 9)
+    return rng.choice([number, number, float(number), f"+86 {number}", f"{str(number)[:3]}-{str(number)[3:]}", None])
+
+def _given_name(rng, i):
+    given = rng.choice(GIVEN_NAMES)
+    if i % 97 == 0:
+        # 超过75字符，触发vCard折行
+        given = given * 40
+    return given
+
+def make_workbook(path, count, seed=0):
+    """生成count个联系人的xlsx：空单元格、数字手机号、中文姓名、超长姓名"""
+    import openpyxl
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('联系人')
+    sheet.append(['姓', '名', '手机'])
+    for i in range(count):
+        sheet.append([rng.choice(FAMILY_NAMES), _given_name(rng, i), _phone(rng)])
+    workbook.save(path)
+
+def make_vcf(path, count, seed=0):
+    """生成count个联系人的VCF：CRLF与LF混用、折叠行、QUOTED-PRINTABLE、多个电话、照片"""
+    import quopri
+    rng = random.Random(seed)
+    with open(path, 'wb') as f:
+        for i in range(count):
+            newline = b'\r\n' if i % 5 else b'\n'
+            family = rng.choice(FAMILY_NAMES) or ''
+            given = _given_name(rng, i)
+            if i % 11 == 0:
+                # vCard 2.1 + QUOTED-PRINTABLE
+                name = quopri.encodestring(f'{family}{given}'.encode('utf-8')).replace(b'\n', b'')
+                lines = [b'BEGIN:VCARD', b'VERSION:2.1', b'FN;CHARSET=UTF-8;ENCODING=QUOTED-PRINTABLE:' + name]
+            else:
+                escaped = f'{family} {given}'.replace('\\', '\\\\').replace(',', '\\,').replace(';', '\\;')
+                fn = f'FN:{escaped}'.encode('utf-8')
+                # 每75字节折一行
+                lines = [b'BEGIN:VCARD', b'VERSION:3.0', fn[:75]] + [b' ' + fn[offset:offset + 74]
+                                                                       for offset in range(75, len(fn), 74)]
+            for _ in range(rng.choice([0, 1, 1, 2, 3])):
+                phone = _phone(rng)
+                if phone is not None:
+                    lines.append(f'TEL;TYPE={rng.choice(["CELL", "HOME", "WORK"])}:{phone}'.encode('utf-8'))
+            if i % 50 == 0:
+                lines.append(b'PHOTO;ENCODING=b;TYPE=JPEG:' + b'QUFB' * 18)
+                lines.extend(b' ' + b'QUFB' * 18 for _ in range(20))
+            lines.append(b'END:VCARD')
+            f.write(newline.join(lines) + newline)
+
+def _peak_bytes():
+    # Linux的ru_maxrss在exec后会沿用父进程的值，优先读本进程的VmHWM
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _case(mode, source, output):
+    # 子进程中执行一次转换，测量耗时和峰值内存
+    sys.path.insert(0, HERE)
+    start = time.perf_counter()
+    if mode in ('excel2vcard', 'excel2vcard.vobject'):
+        from excel2vcard import convert
+        count = convert([source], output, use_vobject=mode.endswith('vobject'))
+    elif mode == 'excel2vcard.delta':
+        from contact_index import export_delta
+        from excel2vcard import read_contact_rows
+        stats = export_delta(read_contact_rows(source), output, output + '.db')
+        count = stats['added'] + stats['changed']
+    elif mode == 'excel2vcard.batch':
+        from batch_convert import excel_files_to_vcard
+        excel_files_to_vcard([source], os.path.dirname(output))
+        count = None
+    elif mode in ('vcard2excel.xlsx', 'vcard2excel.csv'):
+        from vcard2excel import convert
+        count = convert([source], output)
+    elif mode == 'vcard2excel.batch':
+        from batch_convert import vcf_files_to_excel
+        vcf_files_to_excel([source], output)
+        count = None
+    else:
+        raise ValueError(f"未知的模式: {mode}")
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'peak_bytes': _peak_bytes(), 'count': count}))
+
+MODES = {
+    'excel2vcard': ('xlsx', 'contacts.vcf'),
+    'excel2vcard.vobject': ('xlsx', 'contacts.vcf'),
+    'excel2vcard.delta': ('xlsx', 'delta.vcf'),
+    'excel2vcard.batch': ('xlsx', 'contacts.vcf'),
+    'vcard2excel.xlsx': ('vcf', 'contacts.xlsx'),
+    'vcard2excel.csv': ('vcf', 'contacts.csv'),
+    'vcard2excel.batch': ('vcf', 'contacts.csv'),
+}
+
+def _run_case(mode, source, output):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '_case', mode, source, output],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def _startup_seconds(module, repeat):
+    # 启动解释器并导入模块的最短耗时
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=HERE, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def fixture_paths(fixture_dir, size):
+    return {'xlsx': os.path.join(fixture_dir, f'contacts_{size}.xlsx'),
+            'vcf': os.path.join(fixture_dir, f'contacts_{size}.vcf')}
+
+def ensure_fixtures(fixture_dir, sizes):
+    """生成缺少的基准数据，已有的直接复用"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    for size in sizes:
+        paths = fixture_paths(fixture_dir, size)
+        if not os.path.exists(paths['xlsx']):
+            make_workbook(paths['xlsx'], size)
+        if not os.path.exists(paths['vcf']):
+            make_vcf(paths['vcf'], size)
+
+# 指标名的最后一段为指标类型：类型 -> (单位, 是否越大越好)
+METRIC_KINDS = {
+    'startup_ms': ('ms', False),
+    'contacts_per_sec': ('contacts/s', True),
+    'peak_mb': ('MB', False),
+}
+
+def run(fixture_dir, sizes, modes=tuple(MODES), repeat=3):
+    """运行所有基准，返回{指标名: 数值}"""
+    ensure_fixtures(fixture_dir, sizes)
+    results = {}
+    for module in ('excel2vcard', 'vcard2excel', 'batch_convert'):
+        results[f'{module}.startup_ms'] = _startup_seconds(module, repeat) * 1000
+
+    for size in sizes:
+        paths = fixture_paths(fixture_dir, size)
+        for mode in modes:
+            if mode == 'excel2vcard.vobject' and size > VOBJECT_MAX_SIZE:
+                continue
+            source_type, output_name = MODES[mode]
+            with tempfile.TemporaryDirectory() as output_dir:
+                case = _run_case(mode, paths[source_type], os.path.join(output_dir, output_name))
+            results[f'{mode}.{size}.contacts_per_sec'] = size / case['seconds']
+            results[f'{mode}.{size}.peak_mb'] = case['peak_bytes'] / 1024 / 1024
+    return results
+
+def compare(old, new, threshold=0.1):
+    """返回变差超过threshold比例的[(指标名, 原值, 现值, 变差比例)]，两次都有的指标才比较"""
+    regressions = []
+    for name, value in new.items():
+        previous = old.get(name)
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        if METRIC_KINDS[name.rsplit('.', 1)[1]][1]:
+            change = -change
+        if change > threshold:
+            regressions.append((name, previous, value, change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="联系人转换性能基准")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="运行基准并输出JSON")
+    run_parser.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'contact_bench'),
+                            help="基准数据目录，缺少的数据会自动生成")
+    run_parser.add_argument('--sizes', default='1000,10000,100000', help=f"逗号分隔的联系人数，最大可到{SIZES[-1]}")
+    run_parser.add_argument('--modes', default=','.join(MODES), help="逗号分隔的转换模式")
+    run_parser.add_argument('--output', default='bench_contacts.json')
+    generate_parser = subparsers.add_parser('generate', help="只生成基准数据")
+    generate_parser.add_argument('directory')
+    generate_parser.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    compare_parser = subparsers.add_parser('compare', help="对比两次结果，发现回归时返回非0")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    case_parser = subparsers.add_parser('_case')
+    case_parser.add_argument('mode')
+    case_parser.add_argument('source')
+    case_parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    if args.command == '_case':
+        _case(args.mode, args.source, args.output)
+        return 0
+
+    if args.command == 'generate':
+        ensure_fixtures(args.directory, [int(size) for size in args.sizes.split(',')])
+        return 0
+
+    if args.command == 'compare':
+        with open(args.old, encoding='utf-8') as f:
+            old = json.load(f)['results']
+        with open(args.new, encoding='utf-8') as f:
+            new = json.load(f)['results']
+        regressions = compare(old, new, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"回归 {name}: {previous:.4g} -> {current:.4g} (变差 {change:.1%})")
+        if not regressions:
+            print("没有发现回归")
+        return 1 if regressions else 0
+
+    modes = args.modes.split(',')
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"未知的模式: {', '.join(unknown)}")
+    results = run(args.fixtures, [int(size) for size in args.sizes.split(',')], modes)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': sys.version.split()[0],
+                   'results': results}, f, ensure_ascii=False, indent=2)
+    for name, value in results.items():
+        print(f"{name:48s} {value:14.1f} {METRIC_KINDS[name.rsplit('.', 1)[1]][0]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import photo_meta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CAPTURE_DATE = datetime.datetime(2023, 7, 29, 14, 15, 30)
+FORMATS = ('jpeg', 'tiff', 'heic')
+
+class CountingRaw(io.RawIOBase):
+    """包装无缓冲文件，统计实际从磁盘读取的字节数和读取次数"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        self.bytes_read += count or 0
+        self.reads += 1
+        return count
+
+    def seek(self, offset, whence=0):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+def _exif_bytes():
+    # 带MakerNote和缩略图的EXIF，模拟相机直出的照片
+    import piexif
+    from PIL import Image
+    thumbnail = io.BytesIO()
+    Image.new('RGB', (160, 120), (200, 120, 40)).save(thumbnail, 'JPEG')
+    date = CAPTURE_DATE.strftime(photo_meta.EXIF_DATE_FORMAT).encode('ascii')
+    exif = {'0th': {piexif.ImageIFD.Make: b'Bench', piexif.ImageIFD.DateTime: date},
+            'Exif': {piexif.ExifIFD.DateTimeOriginal: date, piexif.ExifIFD.MakerNote: os.urandom(30000)},
+            '1st': {piexif.ImageIFD.Compression: 6}, 'thumbnail': thumbnail.getvalue()}
+    return piexif.dump(exif)
+
+def _noise_image(size, seed):
+    from PIL import Image
+    rng = random.Random(seed)
+    return Image.frombytes('RGB', size, rng.randbytes(size[0] * size[1] * 3))
+
+def make_photos(directory, count, size=(1600, 1200)):
+    """每种格式生成count个带拍摄日期的照片，返回{格式: [路径, ...]}"""
+    os.makedirs(directory, exist_ok=True)
+    exif = _exif_bytes()
+    photos = {}
+    for photo_format in FORMATS:
+        paths = photos[photo_format] = []
+        for i in range(count):
+            path = os.path.join(directory, f'{photo_format}_{i:04d}.{photo_format}')
+            paths.append(path)
+            if os.path.exists(path):
+                continue
+            image = _noise_image(size, i)
+            if photo_format == 'heic':
+                import pillow_heif
+                pillow_heif.register_heif_opener()
+                image.save(path, 'HEIF', exif=exif, quality=50)
+            elif photo_format == 'tiff':
+                image.save(path, 'TIFF', exif=exif)
+            else:
+                image.save(path, 'JPEG', exif=exif, quality=90)
+    return photos
+
+def _legacy_date(f, photo_format):
+    # 改动前PhotoRenamer的读取方式：exifread默认参数解析全部标签，HEIC用pillow_heif读整个文件
+    if photo_format == 'heic':
+        import piexif
+        import pillow_heif
+        exif_dict = piexif.load(pillow_heif.read_heif(f).info['exif'])
+        date_str = exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal].decode('utf-8')
+    else:
+        import exifread
+        date_str = str(exifread.process_file(f)['EXIF DateTimeOriginal'])
+    return datetime.datetime.strptime(date_str, photo_meta.EXIF_DATE_FORMAT)
+
+READERS = {
+    'header': lambda f, photo_format: photo_meta.read_capture_date_from(f),
+    'legacy': _legacy_date,
+}
+
+def _measure(reader, paths, photo_format):
+    bytes_read = reads = 0
+    start = time.perf_counter()
+    for path in paths:
+        raw = CountingRaw(open(path, 'rb', buffering=0))
+        with io.BufferedReader(raw) as f:
+            if reader(f, photo_format) != CAPTURE_DATE:
+                raise AssertionError(f"日期读取错误: {path}")
+        bytes_read += raw.bytes_read
+        reads += raw.reads
+    seconds = time.perf_counter() - start
+    return seconds / len(paths), bytes_read / len(paths), reads / len(paths)
+
+def run(directory, count):
+    """对比头部读取和原有库的每文件耗时、读取字节数、读取次数"""
+    photos = make_photos(directory, count)
+    results = {}
+    for photo_format, paths in photos.items():
+        for name, reader in READERS.items():
+            with open(paths[0], 'rb') as f:
+                reader(f, photo_format)  # 预热，排除导入耗时
+            seconds, bytes_read, reads = _measure(reader, paths, photo_format)
+            prefix = f'{photo_format}.{name}'
+            results[f'{prefix}.ms_per_file'] = {'value': seconds * 1000, 'unit': 'ms', 'higher_is_better': False}
+            results[f'{prefix}.kb_per_file'] = {'value': bytes_read / 1024, 'unit': 'KB', 'higher_is_better': False}
+            results[f'{prefix}.reads_per_file'] = {'value': reads, 'unit': 'reads', 'higher_is_better': False}
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="照片拍摄日期读取基准：头部读取 vs exifread/pillow_heif")
+    parser.add_argument('--photos', default=os.path.join(tempfile.gettempdir(), 'photo_bench'),
+                        help="测试照片目录，缺少的照片会自动生成")
+    parser.add_argument('--count', type=int, default=50, help="每种格式的照片数")
+    parser.add_argument('--output', default='bench_photo_meta.json')
+    args = parser.parse_args(argv)
+
+    results = run(args.photos, args.count)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': sys.version.split()[0],
+                   'results': results}, f, ensure_ascii=False, indent=2)
+    for name, result in results.items():
+        print(f"{name:32s} {result['value']:12.2f} {result['unit']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
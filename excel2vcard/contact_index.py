@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+from excel2vcard import WRITE_BUFFER_SIZE, iter_blocks, normalize_column, serialize_vcard
+
+_NON_DIGITS = re.compile(r'[^\d]')
+
+def normalize_phone(phone):
+    """统一手机号写法：去掉空格、横线、括号，去掉+86/0086国家码，'+86 138-0000-0000' -> '13800000000'"""
+    digits = _NON_DIGITS.sub('', phone)
+    for prefix in ('0086', '86'):
+        if digits.startswith(prefix) and len(digits) == len(prefix) + 11 and digits[len(prefix)] == '1':
+            return digits[len(prefix):]
+    return digits
+
+def contact_key(family, given, phone):
+    # 以规范化后的手机号为键，没有手机号时用姓名
+    phone = normalize_phone(phone)
+    if phone:
+        return 'tel:' + phone
+    name = (family + given).replace(' ', '')
+    return 'name:' + name if name else None
+
+def dedupe_contacts(rows):
+    """按键合并重复联系人：保留第一次出现的记录，空缺的姓、名由后面的重复记录补上
+    返回({键: [姓, 名, 手机]}（保持首次出现的顺序）, 合并掉的行数)"""
+    contacts = {}
+    duplicates = 0
+    for block in iter_blocks(rows):
+        _, block_rows = zip(*block)
+        for family, given, phone in zip(*map(normalize_column, zip(*block_rows))):
+            key = contact_key(family, given, phone)
+            if key is None:
+                continue
+            existing = contacts.get(key)
+            if existing is None:
+                contacts[key] = [family, given, phone]
+                continue
+            duplicates += 1
+            if not existing[0] and not existing[1]:
+                existing[0], existing[1] = family, given
+    return contacts, duplicates
+
+class ContactIndex:
+    """上次导出的联系人索引（SQLite），记录每个联系人的键和vCard摘要"""
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS contacts ('
+                         'key TEXT PRIMARY KEY, digest TEXT NOT NULL, updated REAL NOT NULL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM contacts').fetchone()[0]
+
+    def digests(self):
+        """{键: 摘要}，一次读入内存，比较时只做哈希查找"""
+        with closing(self._connect()) as conn:
+            return dict(conn.execute('SELECT key, digest FROM contacts'))
+
+    def update(self, digests, removed=()):
+        # 新增或修改的联系人和表中已删除的键一次事务写入
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO contacts (key, digest, updated) VALUES (?, ?, ?)',
+                             ((key, digest, now) for key, digest in digests.items()))
+            conn.executemany('DELETE FROM contacts WHERE key = ?', ((key,) for key in removed))
+
+def export_delta(rows, output_file, index_path, full=False):
+    """rows为read_contact_rows读出的(姓, 名, 手机)行；去重后只导出比索引新增或修改过的联系人，并更新索引；
+    full为True时导出全部（仍会去重）。返回{'added', 'changed', 'unchanged', 'duplicates', 'missing'}"""
+    contacts, duplicates = dedupe_contacts(rows)
+    index = ContactIndex(index_path)
+    previous = index.digests()
+    stats = {'added': 0, 'changed': 0, 'unchanged': 0, 'duplicates': duplicates}
+    changed_digests = {}
+    with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        for key, (family, given, phone) in contacts.items():
+            vcard = serialize_vcard(family, given, phone)
+            digest = hashlib.blake2b(vcard.encode('utf-8'), digest_size=16).hexdigest()
+            old_digest = previous.get(key)
+            if old_digest == digest:
+                stats['unchanged'] += 1
+                if not full:
+                    continue
+            else:
+                stats['added' if old_digest is None else 'changed'] += 1
+                changed_digests[key] = digest
+            f.write(vcard)
+    # 表中已经没有的联系人只做统计（vCard无法表达删除），并从索引中移除，以后重新加入时按新增导出
+    missing = [key for key in previous if key not in contacts]
+    index.update(changed_digests, missing)
+    stats['missing'] = len(missing)
+    logging.info(f"新增 {stats['added']}，修改 {stats['changed']}，未变 {stats['unchanged']}，"
+                 f"合并重复 {stats['duplicates']}，表中已删除 {stats['missing']}，输出 {output_file}")
+    return stats
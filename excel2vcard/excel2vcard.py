@@ -1,23 +1,265 @@
-import pandas as pd
-import vobject
+import argparse
+import glob
+import io
 import os
 import logging
-import tkinter as tk
-from tkinter import filedialog
+import sys
+import time
+import zipfile
+from xml.etree import ElementTree
 
 # 设置日志记录
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+CONTACT_COLUMNS = ('姓', '名', '手机')
+# 每处理多少行输出一次进度
+PROGRESS_INTERVAL = 100000
+WRITE_BUFFER_SIZE = 1024 * 1024
+# 按块规范化的行数
+BLOCK_SIZE = 10000
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
 def validate_input(excel_file, output_dir):
     if not os.path.isfile(excel_file):
         raise FileNotFoundError(f"Excel文件 {excel_file} 不存在")
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-def excel_to_vcard(excel_file, output_dir):
+# 列字母 -> 列序号，按列字母而不是单元格引用缓存，大小只取决于列数
+_column_indexes = {}
+
+def _column_index(reference):
+    # 'AB12' -> 27
+    letters = reference.rstrip('0123456789')
+    index = _column_indexes.get(letters)
+    if index is None:
+        index = 0
+        for char in letters:
+            index = index * 26 + ord(char.upper()) - 64
+        index = _column_indexes[letters] = index - 1
+    return index
+
+def _rich_text(element):
+    # 单个<t>或若干<r><t>富文本片段，跳过拼音注音<rPh>
+    texts = element.findall(f'{XLSX_NS}t') + element.findall(f'{XLSX_NS}r/{XLSX_NS}t')
+    return ''.join(text.text or '' for text in texts)
+
+def _cell_value(cell, shared_strings):
+    # 按单元格类型取值：共享字符串、行内字符串、布尔、数字
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        text = cell.find(XLSX_NS + 'is')
+        return _rich_text(text) if text is not None else None
+    value = cell.find(XLSX_NS + 'v')
+    if value is None or value.text is None:
+        return None
+    if cell_type == 's':
+        return shared_strings[int(value.text)]
+    if cell_type == 'b':
+        return value.text == '1'
+    if cell_type in ('str', 'e', 'd'):
+        return value.text
     try:
-        # 读取Excel文件
-        df = pd.read_excel(excel_file)
+        return int(value.text)
+    except ValueError:
+        return float(value.text)
+
+def _xlsx_sheets(archive):
+    # 按工作簿中的顺序返回[(工作表名, XML路径), ...]，经关系文件找到每个sheet对应的XML
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {relation.get('Id'): relation.get('Target') for relation in relations}
+    sheets = []
+    for sheet in workbook.findall(f'{XLSX_NS}sheets/{XLSX_NS}sheet'):
+        target = targets[sheet.get(XLSX_REL_ID)]
+        sheets.append((sheet.get('name'), target.lstrip('/') if target.startswith('/') else 'xl/' + target))
+    return sheets
+
+def list_sheets(excel_file):
+    """工作簿中所有工作表的名称"""
+    if _is_xls(excel_file):
+        import pandas as pd
+        return pd.ExcelFile(excel_file).sheet_names
+    with zipfile.ZipFile(excel_file) as archive:
+        return [name for name, _ in _xlsx_sheets(archive)]
+
+def iter_xlsx_rows(excel_file, sheet=None):
+    """直接解析xlsx中工作表的XML，逐行生成单元格取值列表；比openpyxl只读模式快数倍，内存只保留共享字符串
+    sheet为工作表名，默认第一个工作表（与pd.read_excel一致，不管保存时选中的是哪个）"""
+    with zipfile.ZipFile(excel_file) as archive:
+        names = set(archive.namelist())
+        sheets = _xlsx_sheets(archive)
+        if sheet is None:
+            sheet_path = sheets[0][1]
+        else:
+            sheet_path = dict(sheets)[sheet]
+
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in names:
+            with archive.open('xl/sharedStrings.xml') as f:
+                for _, element in ElementTree.iterparse(f):
+                    if element.tag == XLSX_NS + 'si':
+                        shared_strings.append(_rich_text(element))
+                        element.clear()
+
+        with archive.open(sheet_path) as f:
+            sheet_data = None
+            for event, element in ElementTree.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == XLSX_NS + 'sheetData':
+                        sheet_data = element
+                    continue
+                if element.tag != XLSX_NS + 'row':
+                    continue
+                row = []
+                for position, cell in enumerate(element):
+                    reference = cell.get('r')
+                    column = _column_index(reference) if reference else position
+                    if column >= len(row):
+                        row.extend([None] * (column - len(row) + 1))
+                    row[column] = _cell_value(cell, shared_strings)
+                yield row
+                # 读完的行从树上摘掉，内存不随行数增长
+                sheet_data.remove(element)
+
+def _is_xls(excel_file):
+    return isinstance(excel_file, str) and excel_file.lower().endswith('.xls')
+
+def read_contact_rows(excel_file, sheet=None, columns=CONTACT_COLUMNS):
+    """按行读取联系人，返回(姓, 名, 手机)的迭代器；xlsx流式读取，xls退回pandas
+    columns为(姓, 名, 手机)对应的表头，某项为None表示表中没有这一列"""
+    wanted = [name for name in columns if name is not None]
+    if _is_xls(excel_file):
+        import pandas as pd
+        df = pd.read_excel(excel_file, sheet_name=0 if sheet is None else sheet, dtype=object)
+        header = list(df.columns)
+        rows = (list(values) for values in df.itertuples(index=False, name=None))
+    else:
+        rows = iter_xlsx_rows(excel_file, sheet)
+        header = next(rows, [])
+    missing = [name for name in wanted if name not in header]
+    if missing:
+        rows.close()
+        raise KeyError(f"缺少列: {', '.join(missing)}")
+    positions = [None if name is None else header.index(name) for name in columns]
+    return (tuple(None if position is None or position >= len(row) or _is_nan(row[position]) else row[position]
+                  for position in positions) for row in rows)
+
+def _is_nan(value):
+    # pandas读xls时空单元格为NaN
+    return value != value
+
+def normalize_column(values):
+    """规范化一列取值：空值（None、NaN）为空字符串，整数值的浮点数（如手机号15919067027.0）去掉'.0'"""
+    result = []
+    for value in values:
+        if value is None:
+            result.append('')
+        elif isinstance(value, str):
+            result.append(value)
+        elif isinstance(value, float):
+            if value != value:
+                result.append('')
+            elif value.is_integer():
+                result.append(str(int(value)))
+            else:
+                result.append(str(value))
+        else:
+            result.append(str(value))
+    return result
+
+def _escape(value):
+    # 与vobject的backslashEscape一致
+    value = value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+    return value.replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+
+def _fold(line):
+    # 与vobject的foldOneLine一致：不足75个字符的行原样输出，
+    # 否则按UTF-8字节数折行，每行不超过75字节，续行以一个空格开头
+    if len(line) < 75:
+        return line + '\r\n'
+    parts = []
+    size = 0
+    for char in line:
+        code = ord(char)
+        char_size = 1 if code < 0x80 else 2 if code < 0x800 else 3 if code < 0x10000 else 4
+        if size + char_size > 75:
+            parts.append('\r\n ')
+            size = 1
+        parts.append(char)
+        size += char_size
+    parts.append('\r\n')
+    return ''.join(parts)
+
+def serialize_vcard(family, given, phone):
+    """直接拼出vCard 3.0文本，与vobject.vCard().serialize()的输出逐字节一致"""
+    return ('BEGIN:VCARD\r\nVERSION:3.0\r\n'
+            + _fold(f'FN:{_escape(f"{family} {given}")}')
+            + _fold(f'N:{_escape(family)};{_escape(given)};;;')
+            + _fold(f'TEL;TYPE=CELL:{phone}')
+            + 'END:VCARD\r\n')
+
+def serialize_vcard_vobject(family, given, phone):
+    """兼容模式：用vobject生成vCard"""
+    import vobject
+    
+    # 创建一个新的vCard
+    vcard = vobject.vCard()
+    
+    # 添加姓名
+    vcard.add('n')
+    vcard.n.value = vobject.vcard.Name(family=family, given=given)
+    
+    # 添加显示名称
+    vcard.add('fn')
+    vcard.fn.value = f"{family} {given}"
+    
+    # 添加电话号码
+    vcard.add('tel')
+    vcard.tel.value = phone
+    vcard.tel.type_param = 'CELL'
+    
+    return vcard.serialize()
+
+def iter_blocks(rows, size=BLOCK_SIZE):
+    # 把行迭代器切成块，每块为[(行号, 行), ...]，跳过空行
+    block = []
+    for index, row in enumerate(rows):
+        if all(value is None for value in row):
+            continue
+        block.append((index + 1, row))
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def write_vcards(rows, f, serialize=serialize_vcard):
+    """把联系人行逐块转换后写入已打开的文件，返回写入的联系人数"""
+    written = 0
+    next_progress = PROGRESS_INTERVAL
+    start = time.perf_counter()
+    for block in iter_blocks(rows):
+        line_numbers, block_rows = zip(*block)
+        # 按列规范化，不再逐个单元格判断类型
+        families, givens, phones = map(normalize_column, zip(*block_rows))
+        for line_number, family, given, phone in zip(line_numbers, families, givens, phones):
+            try:
+                f.write(serialize(family, given, phone))
+                written += 1
+            except Exception as e:
+                logging.error(f"处理行 {line_number} 时出错: {e}")
+        if line_numbers[-1] >= next_progress:
+            next_progress = (line_numbers[-1] // PROGRESS_INTERVAL + 1) * PROGRESS_INTERVAL
+            elapsed = time.perf_counter() - start
+            logging.info(f"已处理 {line_numbers[-1]} 行，{line_numbers[-1] / elapsed:.0f} 行/秒")
+    return written
+
+def excel_to_vcard(excel_file, output_dir, use_vobject=False):
+    try:
+        # 按行流式读取Excel文件，不把整个表格载入内存
+        rows = read_contact_rows(excel_file)
     except Exception as e:
         logging.error(f"读取Excel文件时出错: {e}")
         return
@@ -26,58 +268,94 @@ def excel_to_vcard(excel_file, output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    vcards = []
-    
-    # 遍历每一行数据
-    for index, row in df.iterrows():
-        try:
-            # 检查数据类型
-            if not isinstance(row['姓'], str):
-                if pd.isna(row['姓']):
-                    row['姓'] = ''
-                else:
-                    row['姓'] = str(row['姓'])
-            if not isinstance(row['名'], str):
-                if pd.isna(row['名']):
-                    row['名'] = ''
-                else:
-                    row['名'] = str(row['名'])
-            if not isinstance(row['手机'], str):
-                if pd.isna(row['手机']):
-                    row['手机'] = ''
-                else:
-                    row['手机'] = str(row['手机'])
-            
-            # 创建一个新的vCard
-            vcard = vobject.vCard()
-            
-            # 添加姓名
-            vcard.add('n')
-            vcard.n.value = vobject.vcard.Name(family=row['姓'], given=row['名'])
-            
-            # 添加显示名称
-            vcard.add('fn')
-            vcard.fn.value = f"{row['姓']} {row['名']}"
-            
-            # 添加电话号码
-            if pd.notna(row['手机']):
-                vcard.add('tel')
-                vcard.tel.value = row['手机']
-                vcard.tel.type_param = 'CELL'
-            
-            vcards.append(vcard)
-        except Exception as e:
-            logging.error(f"处理行 {index + 1} 时出错: {e}")
-    
-    # 保存所有vCard到单个文件
+    # 逐块转换后直接写入文件，内存占用与联系人数量无关
     output_file = os.path.join(output_dir, "contacts.vcf")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for vcard in vcards:
-            f.write(vcard.serialize())
+    start = time.perf_counter()
+    with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        written = write_vcards(rows, f, serialize_vcard_vobject if use_vobject else serialize_vcard)
     
-    logging.info(f"转换完成，vCard文件保存在 {output_file}")
+    logging.info(f"转换完成，共 {written} 个联系人，用时 {time.perf_counter() - start:.1f} 秒，vCard文件保存在 {output_file}")
+
+def expand_inputs(patterns, extensions):
+    """把命令行输入展开成文件列表：目录取其中指定扩展名的文件，通配符按字母序展开，'-'表示标准输入"""
+    paths = []
+    for pattern in patterns:
+        if pattern == '-':
+            paths.append(pattern)
+        elif os.path.isdir(pattern):
+            paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(extensions)))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+def convert(inputs, output, sheet=None, columns=CONTACT_COLUMNS, use_vobject=False):
+    """把多个Excel文件依次转换写入同一个vCard文件，output为'-'时写到标准输出，返回联系人数
+    输入为'-'时从标准输入读取xlsx"""
+    serialize = serialize_vcard_vobject if use_vobject else serialize_vcard
+    if output == '-':
+        f = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=False)
+    else:
+        f = open(output, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+    written = 0
+    try:
+        for excel_file in inputs:
+            if excel_file == '-':
+                # zip需要随机读取，标准输入先读入内存
+                excel_file = io.BytesIO(sys.stdin.buffer.read())
+            written += write_vcards(read_contact_rows(excel_file, sheet, columns), f, serialize)
+    finally:
+        f.flush()
+        if output == '-':
+            f.detach()  # 不关闭标准输出
+        else:
+            f.close()
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Excel联系人转vCard，不带参数时打开图形界面")
+    parser.add_argument('inputs', nargs='*', help="xlsx/xls文件、目录或通配符，'-'为标准输入")
+    parser.add_argument('-o', '--output', default='contacts.vcf', help="输出的vcf文件，'-'为标准输出")
+    parser.add_argument('--sheet', help="工作表名，默认第一个工作表")
+    parser.add_argument('--family-column', default=CONTACT_COLUMNS[0], help="姓所在列的表头，空字符串表示没有")
+    parser.add_argument('--given-column', default=CONTACT_COLUMNS[1], help="名所在列的表头")
+    parser.add_argument('--phone-column', default=CONTACT_COLUMNS[2], help="手机所在列的表头")
+    parser.add_argument('--vobject', action='store_true', help="用vobject生成（兼容模式，较慢）")
+    parser.add_argument('--index', help="联系人索引文件；指定后按手机号去重，只导出上次以来新增或修改的联系人")
+    parser.add_argument('--full', action='store_true', help="配合--index使用：去重后导出全部联系人，并刷新索引")
+    args = parser.parse_args(argv)
+
+    if not args.inputs:
+        select_files()
+        return 0
+    inputs = expand_inputs(args.inputs, ('.xlsx', '.xls'))
+    if not inputs:
+        parser.error("没有找到输入文件")
+    columns = tuple(name or None for name in (args.family_column, args.given_column, args.phone_column))
+    start = time.perf_counter()
+    try:
+        if args.index:
+            from itertools import chain
+            from contact_index import export_delta
+            if '-' in inputs or args.output == '-':
+                parser.error("--index 不支持标准输入输出")
+            rows = chain.from_iterable(read_contact_rows(excel_file, args.sheet, columns) for excel_file in inputs)
+            stats = export_delta(rows, args.output, args.index, args.full)
+            written = stats['added'] + stats['changed'] + (stats['unchanged'] if args.full else 0)
+        else:
+            written = convert(inputs, args.output, args.sheet, columns, args.vobject)
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        logging.error(f"转换失败: {e}")
+        return 1
+    logging.info(f"转换完成，共 {written} 个联系人，用时 {time.perf_counter() - start:.1f} 秒，输出 {args.output}")
+    return 0
 
 def select_files():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()  # 隐藏主窗口
     
@@ -98,4 +376,4 @@ def select_files():
         logging.error(f"程序出错: {e}")
 
 if __name__ == "__main__":
-    select_files()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
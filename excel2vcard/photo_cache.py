@@ -0,0 +1,90 @@
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+
+# 超过这么多天没有用到的记录在压缩时删除
+MAX_AGE_DAYS = 180
+MAX_ENTRIES = 1000000
+
+class MetadataCache:
+    """照片拍摄日期缓存（SQLite），以(路径, 大小, 修改时间)为键，文件没变时不用再读文件内容
+    get可以在多个线程中调用；写入先在内存中排队，由flush在一个事务中写入
+    数据库出错（如另一个进程正在整理时被锁住）时查询视为未命中、写入直接丢弃，不影响重命名"""
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._puts = []
+        self._touched = []
+        self._renames = []
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS photos ('
+                               'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+                               'date TEXT NOT NULL, source TEXT NOT NULL, used REAL NOT NULL)')
+
+    def get(self, path, size, mtime_ns):
+        """返回(拍摄日期, 来源)，没有缓存或文件已变化时返回None"""
+        with self._lock:
+            try:
+                row = self._conn.execute('SELECT date, source FROM photos WHERE path = ? AND size = ? AND mtime_ns = ?',
+                                         (path, size, mtime_ns)).fetchone()
+            except sqlite3.Error as e:
+                logging.warning(f"读取缓存失败: {path}, 错误: {e}")
+                return None
+            if row is not None:
+                self._touched.append(path)
+        if row is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0]), row[1]
+
+    def put(self, path, size, mtime_ns, date_time, source):
+        with self._lock:
+            self._puts.append((path, size, mtime_ns, date_time.isoformat(), source))
+
+    def rename(self, old_path, new_path):
+        # 重命名不改变大小和修改时间，只需要改路径
+        with self._lock:
+            self._renames.append((new_path, old_path))
+
+    def flush(self):
+        with self._lock:
+            puts, touched, renames = self._puts, self._touched, self._renames
+            self._puts, self._touched, self._renames = [], [], []
+            now = time.time()
+            try:
+                with self._conn:
+                    self._conn.executemany('INSERT OR REPLACE INTO photos (path, size, mtime_ns, date, source, used) '
+                                           'VALUES (?, ?, ?, ?, ?, ?)', (put + (now,) for put in puts))
+                    self._conn.executemany('UPDATE photos SET used = ? WHERE path = ?',
+                                           ((now, path) for path in touched))
+                    self._conn.executemany('UPDATE OR REPLACE photos SET path = ? WHERE path = ?', renames)
+            except sqlite3.Error as e:
+                logging.warning(f"写入缓存失败: {self.path}, 错误: {e}")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+
+    def compact(self, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES):
+        """删除长时间没有用到的记录，超过max_entries时只保留最近用到的；删除较多时整理数据库文件，返回删除的记录数"""
+        self.flush()
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute('DELETE FROM photos WHERE used < ?',
+                                             (time.time() - max_age_days * 86400,)).rowcount
+                remaining = self._conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+                if remaining > max_entries:
+                    deleted += self._conn.execute('DELETE FROM photos WHERE path NOT IN '
+                                                  '(SELECT path FROM photos ORDER BY used DESC LIMIT ?)',
+                                                  (max_entries,)).rowcount
+                    remaining = max_entries
+            if deleted and deleted * 10 >= remaining + deleted:
+                self._conn.execute('VACUUM')
+        return deleted
+
+    def close(self):
+        self.flush()
+        self._conn.close()
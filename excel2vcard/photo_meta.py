@@ -0,0 +1,222 @@
+import datetime
+import struct
+
+# 只读文件头取拍摄日期：JPEG只读EXIF所在的APP1段，TIFF只读IFD0和Exif子IFD，
+# HEIF只读meta盒和Exif项，一般每个文件只需要读几KB
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1', b'avif'}
+# meta盒和多段Exif项需要整块读入内存，超过上限时交给完整解析
+MAX_BOX_SIZE = 1024 * 1024
+
+def _bytes_reader(data, base=0):
+    # read_at(偏移, 长度)：从内存数据中按偏移读取
+    def read_at(offset, size):
+        chunk = data[base + offset:base + offset + size]
+        if offset < 0 or len(chunk) != size:
+            raise ValueError("数据越界")
+        return chunk
+    return read_at
+
+def _file_reader(f, base=0):
+    # read_at(偏移, 长度)：seek到文件中的偏移再读，只读需要的字节
+    def read_at(offset, size):
+        if offset < 0:
+            raise ValueError("数据越界")
+        f.seek(base + offset)
+        chunk = f.read(size)
+        if len(chunk) != size:
+            raise ValueError("文件提前结束")
+        return chunk
+    return read_at
+
+def _find_entry(read_at, endian, ifd_offset, tag):
+    # 在IFD中查找tag，返回(类型, 数量, 值或偏移的4个字节)，没有时返回None
+    count, = struct.unpack(endian + 'H', read_at(ifd_offset, 2))
+    entries = read_at(ifd_offset + 2, count * 12)
+    for position in range(0, len(entries), 12):
+        entry_tag, entry_type, entry_count = struct.unpack_from(endian + 'HHI', entries, position)
+        if entry_tag == tag:
+            return entry_type, entry_count, entries[position + 8:position + 12]
+    return None
+
+def _tiff_date(read_at):
+    """从TIFF结构（read_at的偏移0为TIFF头）读取DateTimeOriginal：IFD0 -> Exif子IFD"""
+    header = read_at(0, 8)
+    if header[:2] == b'II':
+        endian = '<'
+    elif header[:2] == b'MM':
+        endian = '>'
+    else:
+        raise ValueError("不是TIFF数据")
+    magic, ifd0_offset = struct.unpack(endian + 'HI', header[2:])
+    if magic != 42:
+        raise ValueError("不是TIFF数据")
+    entry = _find_entry(read_at, endian, ifd0_offset, TAG_EXIF_IFD)
+    if entry is None:
+        return None
+    exif_offset, = struct.unpack(endian + 'I', entry[2])
+    entry = _find_entry(read_at, endian, exif_offset, TAG_DATETIME_ORIGINAL)
+    if entry is None:
+        return None
+    _, count, value = entry
+    if count > 4:
+        value = read_at(struct.unpack(endian + 'I', value)[0], count)
+    try:
+        return datetime.datetime.strptime(value[:count].decode('ascii').strip('\x00 '), EXIF_DATE_FORMAT)
+    except (UnicodeDecodeError, ValueError):
+        # 相机写入的空日期（0000:00:00 00:00:00）等，视为没有拍摄日期
+        return None
+
+def _jpeg_date(f):
+    # 逐段跳过，直到EXIF的APP1段；遇到图像数据（SOS）还没有EXIF时说明没有
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            raise ValueError("JPEG段标记错误")
+        code = marker[1]
+        while code == 0xFF:
+            code = f.read(1)[0]
+        if code in (0xD9, 0xDA):
+            return None
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue
+        length, = struct.unpack('>H', f.read(2))
+        start = f.tell()
+        if code == 0xE1 and f.read(6) == b'Exif\x00\x00':
+            return _tiff_date(_file_reader(f, start + 6))
+        f.seek(start + length - 2)
+
+def _iter_boxes(read_at, start, end):
+    # 生成ISO BMFF盒的(类型, 内容起始, 盒结束)
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack('>I4s', read_at(offset, 8))
+        header_size = 8
+        if size == 1:
+            size, = struct.unpack('>Q', read_at(offset + 8, 8))
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            raise ValueError("盒大小错误")
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+def _uint(data, position, size):
+    if position + size > len(data):
+        raise ValueError("数据越界")
+    return int.from_bytes(data[position:position + size], 'big')
+
+def _exif_item_ids(meta, start, end):
+    # iinf盒：找出类型为Exif的项
+    version = meta[start]
+    position = start + 4 + (2 if version == 0 else 4)
+    item_ids = []
+    for box_type, body, _ in _iter_boxes(_bytes_reader(meta), position, end):
+        if box_type != b'infe' or meta[body] < 2:
+            continue
+        id_size = 2 if meta[body] == 2 else 4
+        item_id = _uint(meta, body + 4, id_size)
+        if meta[body + 4 + id_size + 2:body + 4 + id_size + 6] == b'Exif':
+            item_ids.append(item_id)
+    return item_ids
+
+def _item_location(meta, start, item_id):
+    # iloc盒：返回项的(构造方式, [(偏移, 长度), ...])，构造方式0为文件偏移，1为idat内偏移
+    version = meta[start]
+    position = start + 4
+    offset_size, length_size = meta[position] >> 4, meta[position] & 0x0F
+    base_offset_size = meta[position + 1] >> 4
+    index_size = meta[position + 1] & 0x0F if version in (1, 2) else 0
+    position += 2
+    id_size = 2 if version < 2 else 4
+    item_count = _uint(meta, position, id_size)
+    position += id_size
+    for _ in range(item_count):
+        current_id = _uint(meta, position, id_size)
+        position += id_size
+        method = 0
+        if version in (1, 2):
+            method = _uint(meta, position, 2) & 0x0F
+            position += 2
+        position += 2  # data_reference_index
+        base_offset = _uint(meta, position, base_offset_size)
+        position += base_offset_size
+        extent_count = _uint(meta, position, 2)
+        position += 2
+        extents = []
+        for _ in range(extent_count):
+            position += index_size
+            extent_offset = _uint(meta, position, offset_size)
+            position += offset_size
+            extent_length = _uint(meta, position, length_size)
+            position += length_size
+            extents.append((base_offset + extent_offset, extent_length))
+        if current_id == item_id:
+            return method, extents
+    raise ValueError(f"iloc中没有项 {item_id}")
+
+def _heif_date(f, file_size):
+    read_at = _file_reader(f)
+    for box_type, body, end in _iter_boxes(read_at, 0, file_size):
+        if box_type == b'meta':
+            break
+        if box_type == b'mdat':
+            raise ValueError("meta盒在mdat之后")
+    else:
+        raise ValueError("没有meta盒")
+    if end - body > MAX_BOX_SIZE:
+        raise ValueError("meta盒过大")
+    meta = read_at(body, end - body)
+    children = {box_type: (child_body, child_end)
+                for box_type, child_body, child_end in _iter_boxes(_bytes_reader(meta), 4, len(meta))}
+    if b'iinf' not in children or b'iloc' not in children:
+        raise ValueError("缺少iinf或iloc盒")
+    item_ids = _exif_item_ids(meta, *children[b'iinf'])
+    if not item_ids:
+        return None
+    method, extents = _item_location(meta, children[b'iloc'][0], item_ids[0])
+    if method == 0 and len(extents) == 1 and extents[0][1]:
+        item_read_at = _file_reader(f, extents[0][0])
+    else:
+        # 多段或存放在idat中的Exif项，拼成一块再解析
+        if method == 1:
+            if b'idat' not in children:
+                raise ValueError("缺少idat盒")
+            idat_body = children[b'idat'][0]
+            source = _bytes_reader(meta, idat_body)
+        elif method == 0:
+            source = read_at
+        else:
+            raise ValueError(f"不支持的iloc构造方式 {method}")
+        if not all(length for _, length in extents) or sum(length for _, length in extents) > MAX_BOX_SIZE:
+            raise ValueError("Exif项大小错误")
+        item_read_at = _bytes_reader(b''.join(source(offset, length) for offset, length in extents))
+    # Exif项以4字节的TIFF头偏移开头
+    tiff_offset, = struct.unpack('>I', item_read_at(0, 4))
+    return _tiff_date(lambda offset, size: item_read_at(4 + tiff_offset + offset, size))
+
+def read_capture_date_from(f):
+    """从二进制文件对象读取EXIF拍摄日期（DateTimeOriginal），支持JPEG、TIFF和HEIF/HEIC
+    没有拍摄日期时返回None；格式不支持或文件损坏时抛出ValueError"""
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(0)
+    head = f.read(12)
+    try:
+        if head[:2] == b'\xff\xd8':
+            return _jpeg_date(f)
+        if head[:4] in (b'II*\x00', b'MM\x00*'):
+            return _tiff_date(_file_reader(f))
+        if head[4:8] == b'ftyp' and head[8:12] in HEIF_BRANDS:
+            return _heif_date(f, file_size)
+    except (struct.error, IndexError, OverflowError) as e:
+        raise ValueError(f"文件头解析失败: {e}") from e
+    raise ValueError("不支持的文件格式")
+
+def read_capture_date(file_path):
+    with open(file_path, 'rb') as f:
+        return read_capture_date_from(f)
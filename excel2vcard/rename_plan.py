@@ -0,0 +1,232 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+JOURNAL_DIR = 'rename_journals'
+
+def _target_name(names, base_name, ext, original_name):
+    # 与逐个检查os.path.exists的结果一致：不重名时用base_name，否则依次加_1、_2……
+    new_name = f"{base_name}{ext}"
+    if new_name.lower() == original_name.lower():
+        return new_name
+    counter = 1
+    while new_name.lower() in names:
+        new_name = f"{base_name}_{counter}{ext}"
+        counter += 1
+    return new_name
+
+def plan_renames(items, date_format):
+    """items为按处理顺序排列的[(路径, 拍摄日期), ...]，返回需要执行的[(原路径, 新路径), ...]
+    每个目录只列一次，重名在内存中的小写文件名索引里解决，不再对每个候选名stat"""
+    directories = {}
+    plan = []
+    for file_path, date_time in items:
+        if not date_time:
+            continue
+        directory, original_name = os.path.split(file_path)
+        names = directories.get(directory)
+        if names is None:
+            try:
+                names = directories[directory] = {name.lower() for name in os.listdir(directory or '.')}
+            except OSError as e:
+                logging.error(f"读取目录失败: {directory}, 错误: {e}")
+                continue
+        new_name = _target_name(names, date_time.strftime(date_format), os.path.splitext(original_name)[1],
+                                original_name)
+        if new_name == original_name:
+            continue
+        # 按顺序执行时，前面的文件改名后原来的名字就空出来了
+        names.discard(original_name.lower())
+        names.add(new_name.lower())
+        plan.append((file_path, os.path.join(directory, new_name)))
+    return plan
+
+class RenameJournal:
+    """重命名预写日志（JSON lines）：执行前先写入完整计划，每完成、跳过、撤销一项追加一行"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        # 执行和撤销期间只打开一次，避免每个文件都打开、关闭日志
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+        self._file = None
+
+    @classmethod
+    def create(cls, plan, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        name = f"rename_{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}.jsonl"
+        journal = cls(os.path.join(directory, name))
+        with open(journal.path, 'x', encoding='utf-8') as f:
+            for old_path, new_path in plan:
+                f.write(json.dumps({'op': 'plan', 'old': old_path, 'new': new_path}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return journal
+
+    def load(self):
+        """返回(计划, {序号: 最后的状态})，状态为'done'、'skip'或'undo'；日志末尾有'end'时计划已执行完"""
+        plan = []
+        states = {}
+        ended = False
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    break
+                if record['op'] == 'plan':
+                    plan.append((record['old'], record['new']))
+                elif record['op'] == 'end':
+                    ended = True
+                else:
+                    states[record['index']] = record['op']
+        return plan, states, ended
+
+    def record(self, op, index=None, **fields):
+        # 每条记录都落盘，断电后日志不会比实际的重命名落后
+        self._file.write(json.dumps(dict(fields, op=op, index=index), ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+def _rename(old_path, new_path):
+    # 目标已存在时不覆盖，只改大小写的除外
+    if os.path.exists(new_path) and old_path.lower() != new_path.lower():
+        raise FileExistsError(f"目标文件已存在: {new_path}")
+    os.rename(old_path, new_path)
+
+def _recover(journal, plan, states):
+    """找出中断前已经改名但没有记录的项：按顺序执行时，最后一个已改名的项之前的未记录项都执行过，
+    目标存在的记为完成（原路径可能已被后面的项占用），其余记为跳过"""
+    pending = [index for index in range(len(plan)) if index not in states]
+    last = None
+    for position in reversed(range(len(pending))):
+        old_path, new_path = plan[pending[position]]
+        if not os.path.exists(old_path) and os.path.exists(new_path):
+            last = position
+            break
+    if last is None:
+        return
+    occupied = set()  # 后面已完成的项占用的路径
+    for index in reversed(pending[:last + 1]):
+        old_path, new_path = plan[index]
+        if os.path.exists(new_path) and (old_path in occupied or not os.path.exists(old_path)):
+            journal.record('done', index)
+            states[index] = 'done'
+            occupied.add(new_path)
+        else:
+            journal.record('skip', index, error="中断前重命名失败")
+            states[index] = 'skip'
+
+def _apply(journal, plan, states, on_renamed=None, should_stop=None):
+    renamed = 0
+    for index, (old_path, new_path) in enumerate(plan):
+        if index in states:
+            continue
+        if should_stop is not None and should_stop():
+            break
+        try:
+            _rename(old_path, new_path)
+        except OSError as e:
+            logging.error(f"重命名失败: {old_path}, 错误: {e}")
+            journal.record('skip', index, error=str(e))
+            continue
+        journal.record('done', index)
+        logging.info(f'重命名成功: "{old_path}" 重命名为 "{new_path}"')
+        renamed += 1
+        if on_renamed is not None:
+            on_renamed(index, old_path, new_path)
+    journal.record('end')
+    return renamed
+
+def apply_plan(plan, on_renamed=None, should_stop=None, directory=JOURNAL_DIR):
+    """先把计划写入日志，再按顺序重命名；返回(日志, 重命名的文件数)
+    on_renamed(序号, 原路径, 新路径)在每个文件改名后调用，should_stop()返回True时停止"""
+    journal = RenameJournal.create(plan, directory)
+    with journal:
+        return journal, _apply(journal, plan, {}, on_renamed, should_stop)
+
+def resume(journal_path, on_renamed=None, should_stop=None):
+    """继续执行中断的计划，已完成的项不会重复执行，返回本次重命名的文件数"""
+    journal = RenameJournal(journal_path)
+    plan, states, _ = journal.load()
+    with journal:
+        _recover(journal, plan, states)
+        return _apply(journal, plan, states, on_renamed, should_stop)
+
+def undo(journal_path, on_restored=None, should_stop=None):
+    """按相反顺序把日志中已完成的重命名改回去，返回改回的文件数
+    on_restored(序号, 原路径, 新路径)在每个文件改回后调用，should_stop()返回True时停止
+    日志没有'end'时计划可能还在执行或中途崩溃，抛出ValueError，应先用resume执行完"""
+    journal = RenameJournal(journal_path)
+    plan, states, ended = journal.load()
+    if not ended:
+        raise ValueError(f"重命名没有执行完，需要先继续执行再撤销: {journal_path}")
+    restored = 0
+    with journal:
+        for index in reversed(range(len(plan))):
+            if states.get(index) != 'done':
+                continue
+            if should_stop is not None and should_stop():
+                break
+            old_path, new_path = plan[index]
+            try:
+                _rename(new_path, old_path)
+            except OSError as e:
+                logging.error(f"撤销失败: {new_path}, 错误: {e}")
+                continue
+            journal.record('undo', index)
+            logging.info(f'撤销重命名: "{new_path}" 改回 "{old_path}"')
+            restored += 1
+            if on_restored is not None:
+                on_restored(index, old_path, new_path)
+    return restored
+
+def latest_journal(directory=JOURNAL_DIR):
+    journals = sorted(glob.glob(os.path.join(directory, 'rename_*.jsonl')))
+    return journals[-1] if journals else None
+
+def find_incomplete_journal(directory=JOURNAL_DIR):
+    # 最近一次执行没有写入'end'说明中途崩溃
+    journal_path = latest_journal(directory)
+    if journal_path is not None and not RenameJournal(journal_path).load()[2]:
+        return journal_path
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查看、继续或撤销照片重命名日志")
+    parser.add_argument('command', choices=['show', 'resume', 'undo'])
+    parser.add_argument('journal', nargs='?', help=f"日志文件，默认为{JOURNAL_DIR}中最近的一个")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    journal_path = args.journal or latest_journal()
+    if journal_path is None:
+        parser.error("没有找到重命名日志")
+    if args.command == 'resume':
+        logging.info(f"继续执行 {journal_path}，重命名 {resume(journal_path)} 个文件")
+    elif args.command == 'undo':
+        try:
+            logging.info(f"撤销 {journal_path}，改回 {undo(journal_path)} 个文件")
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        plan, states, ended = RenameJournal(journal_path).load()
+        for index, (old_path, new_path) in enumerate(plan):
+            print(f'{states.get(index, "pending"):8s} "{old_path}" -> "{new_path}"')
+        print(f"共 {len(plan)} 项，{'已执行完' if ended else '未执行完'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import pytest
+
+import batch_convert
+import excel2vcard
+import vcard2excel
+from test_vcard2excel import VCF
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def _workbook(path, sheets):
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        sheet = workbook.create_sheet(title)
+        sheet.append(['姓', '名', '手机'])
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def test_excel_files_to_vcard_matches_convert(tmp_path):
+    first = _workbook(tmp_path / 'a.xlsx', {'联系人': [['张', '三', '13800000000'], ['李', '四', '13900000000']],
+                                            '其他': [['王', '五', '13700000000']]})
+    second = _workbook(tmp_path / 'b.xlsx', {'Sheet': [['Smith', 'John', '+1 555 0100']]})
+    expected = b''
+    for excel_file, sheet in [(first, '联系人'), (first, '其他'), (second, 'Sheet')]:
+        excel2vcard.convert([excel_file], str(tmp_path / 'single.vcf'), sheet)
+        expected += (tmp_path / 'single.vcf').read_bytes()
+
+    [output] = batch_convert.excel_files_to_vcard([first, second], str(tmp_path / 'out'), workers=2)
+    with open(output, 'rb') as f:
+        assert f.read() == expected
+    shards = batch_convert.excel_files_to_vcard([first, second], str(tmp_path / 'shards'), shard_size=3, workers=1)
+    assert [path.rsplit('_', 1)[1] for path in shards] == ['001.vcf', '002.vcf']
+    assert b''.join(open(path, 'rb').read() for path in shards) == expected
+
+
+@pytest.mark.parametrize('command', ['to-vcard', 'to-excel'])
+def test_missing_input_is_reported(tmp_path, caplog, command):
+    missing = str(tmp_path / 'missing')
+    assert batch_convert.main([command, missing, '-o', str(tmp_path / 'out')]) == 1
+    assert missing in caplog.text
+
+
+def test_ranges_split_anywhere_match_convert(tmp_path):
+    # 每个偏移处拆成两段，包括行中间、折行和QUOTED-PRINTABLE续行中间
+    path = tmp_path / 'contacts.vcf'
+    path.write_bytes(VCF)
+    expected = list(vcard2excel.iter_contacts(VCF.splitlines(keepends=True)))
+    for offset in range(len(VCF) + 1):
+        lines = [line for start, end in [(0, offset), (offset, len(VCF))]
+                 for line in batch_convert.iter_lines_in_range(str(path), start, end)]
+        assert list(vcard2excel.iter_contacts(lines)) == expected, offset
+
+
+@pytest.mark.parametrize('chunk_bytes', [7, 64, 1 << 20])
+def test_vcf_files_to_excel_matches_convert(tmp_path, chunk_bytes):
+    path = tmp_path / 'contacts.vcf'
+    path.write_bytes(VCF)
+    inputs = [str(path), str(path)]
+    vcard2excel.convert(inputs, str(tmp_path / 'single.csv'))
+    [output] = batch_convert.vcf_files_to_excel(inputs, str(tmp_path / 'batch.csv'), workers=2, chunk_bytes=chunk_bytes)
+    assert (tmp_path / 'batch.csv').read_bytes() == (tmp_path / 'single.csv').read_bytes()
+    assert output == str(tmp_path / 'batch.csv')
@@ -0,0 +1,20 @@
+from contact_index import export_delta
+
+ALICE = ('张', '三', '13800000000')
+BOB = ('李', '四', '+86 139-0000-0000')
+
+
+def test_deleted_contact_is_exported_again_when_readded(tmp_path):
+    output = str(tmp_path / 'delta.vcf')
+    index_path = str(tmp_path / 'index.db')
+
+    assert export_delta([ALICE, BOB], output, index_path)['added'] == 2
+    stats = export_delta([ALICE], output, index_path)
+    assert (stats['unchanged'], stats['missing']) == (1, 1)
+    assert export_delta([ALICE], output, index_path)['missing'] == 0
+
+    # 删除后以相同内容重新加入，仍按新增导出
+    stats = export_delta([ALICE, BOB], output, index_path)
+    assert (stats['added'], stats['unchanged']) == (1, 1)
+    with open(output, encoding='utf-8') as f:
+        assert f.read().count('BEGIN:VCARD') == 1
@@ -0,0 +1,40 @@
+import datetime
+import sqlite3
+
+from photo_cache import MetadataCache
+
+DATE = datetime.datetime(2023, 7, 29, 14, 15, 30)
+
+
+def test_hit_miss_and_rename(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'))
+    cache.put('/photos/a.jpg', 100, 5, DATE, 'exif')
+    cache.flush()
+    assert cache.get('/photos/a.jpg', 100, 5) == (DATE, 'exif')
+    assert cache.get('/photos/a.jpg', 100, 6) is None
+
+    cache.rename('/photos/a.jpg', '/photos/20230729_141530.jpg')
+    cache.flush()
+    assert cache.get('/photos/a.jpg', 100, 5) is None
+    assert cache.get('/photos/20230729_141530.jpg', 100, 5) == (DATE, 'exif')
+    cache.close()
+
+
+def test_locked_database_is_a_miss(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = MetadataCache(path, timeout=0.1)
+    cache.put('/photos/a.jpg', 100, 5, DATE, 'exif')
+    cache.flush()
+
+    # 另一个进程整理数据库时持有排他锁
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute('BEGIN EXCLUSIVE')
+    try:
+        assert cache.get('/photos/a.jpg', 100, 5) is None
+        cache.put('/photos/b.jpg', 100, 5, DATE, 'exif')
+        cache.flush()
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+    assert cache.get('/photos/a.jpg', 100, 5) == (DATE, 'exif')
+    cache.close()
@@ -0,0 +1,72 @@
+import datetime
+import io
+import struct
+
+import pytest
+
+from photo_meta import read_capture_date_from
+
+DATE = datetime.datetime(2023, 7, 29, 14, 15, 30)
+
+# 小端TIFF：IFD0(偏移8) -> Exif子IFD(偏移26) -> DateTimeOriginal字符串(偏移44，20字节)
+TIFF = (b'II*\x00' + struct.pack('<I', 8)
+        + struct.pack('<HHHII', 1, 0x8769, 4, 1, 26) + b'\x00' * 4
+        + struct.pack('<HHHII', 1, 0x9003, 2, 20, 44) + b'\x00' * 4
+        + b'2023:07:29 14:15:30\x00')
+# 相机没有设置时间时写入的空日期
+TIFF_EMPTY_DATE = TIFF[:44] + b'0000:00:00 00:00:00\x00'
+# 大端TIFF，IFD0中没有Exif子IFD
+TIFF_NO_EXIF = b'MM\x00*' + struct.pack('>I', 8) + struct.pack('>HHHII', 1, 0x0112, 3, 1, 0) + b'\x00' * 4
+
+EXIF_ITEM = struct.pack('>I', 6) + b'Exif\x00\x00' + TIFF
+JFIF = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+JPEG = b'\xff\xd8' + JFIF + b'\xff\xe1' + struct.pack('>H', 8 + len(TIFF)) + b'Exif\x00\x00' + TIFF + b'\xff\xda'
+JPEG_NO_EXIF = b'\xff\xd8' + JFIF + b'\xff\xda\x00\x08' + b'\x00' * 6 + b'\xff\xd9'
+
+
+def _box(box_type, body):
+    return struct.pack('>I', 8 + len(body)) + box_type + body
+
+
+def _full_box(box_type, version, body):
+    return _box(box_type, bytes([version, 0, 0, 0]) + body)
+
+
+def _heif(extents, method, idat=b'', mdat=b''):
+    """Exif项为1号项；method为0时extents是mdat内容中的偏移，为1时是idat中的偏移"""
+    ftyp = _box(b'ftyp', b'heic' + b'\x00' * 4 + b'mif1heic')
+    iinf = _full_box(b'iinf', 0, struct.pack('>H', 1) + _full_box(b'infe', 2, struct.pack('>HH', 1, 0) + b'Exif\x00'))
+
+    def meta(base):
+        iloc = _full_box(b'iloc', 1, bytes([0x44, 0x00]) + struct.pack('>HHHH', 1, 1, method, 0)
+                         + struct.pack('>H', len(extents))
+                         + b''.join(struct.pack('>II', base + offset, length) for offset, length in extents))
+        return _full_box(b'meta', 0, iinf + iloc + (_box(b'idat', idat) if idat else b''))
+
+    # 文件偏移要加上mdat之前的长度
+    base = len(ftyp) + len(meta(0)) + 8 if method == 0 else 0
+    return ftyp + meta(base) + (_box(b'mdat', mdat) if mdat else b'')
+
+
+HEIF_IDAT = _heif([(0, len(EXIF_ITEM))], 1, idat=EXIF_ITEM)
+HEIF_MULTI_EXTENT = _heif([(0, 10), (10, len(EXIF_ITEM) - 10)], 0, mdat=EXIF_ITEM)
+HEIF_SINGLE_EXTENT = _heif([(0, len(EXIF_ITEM))], 0, mdat=EXIF_ITEM)
+
+
+@pytest.mark.parametrize('data', [TIFF, JPEG, HEIF_IDAT, HEIF_MULTI_EXTENT, HEIF_SINGLE_EXTENT],
+                         ids=['tiff', 'jpeg', 'heif-idat', 'heif-multi-extent', 'heif-single-extent'])
+def test_reads_capture_date(data):
+    assert read_capture_date_from(io.BytesIO(data)) == DATE
+
+
+@pytest.mark.parametrize('data', [TIFF_EMPTY_DATE, TIFF_NO_EXIF, JPEG_NO_EXIF],
+                         ids=['empty-date', 'no-exif-ifd', 'jpeg-no-app1'])
+def test_missing_capture_date_is_none(data):
+    assert read_capture_date_from(io.BytesIO(data)) is None
+
+
+@pytest.mark.parametrize('data', [b'GIF89a' + b'\x00' * 20, JPEG[:len(JPEG) // 2], TIFF[:30]],
+                         ids=['unsupported', 'truncated-jpeg', 'truncated-tiff'])
+def test_unreadable_header_raises_value_error(data):
+    with pytest.raises(ValueError):
+        read_capture_date_from(io.BytesIO(data))
@@ -0,0 +1,25 @@
+import pytest
+
+import excel2vcard
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def test_default_sheet_is_first_not_active(tmp_path):
+    path = str(tmp_path / 'contacts.xlsx')
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.title = '联系人'
+    first.append(['姓', '名', '手机'])
+    first.append(['张', '三', '13800000000'])
+    second = workbook.create_sheet('其他')
+    second.append(['姓', '名', '手机'])
+    second.append(['李', '四', '13900000000'])
+    # 保存时选中的是第二个工作表
+    workbook.active = 1
+    workbook.save(path)
+
+    assert excel2vcard.list_sheets(path) == ['联系人', '其他']
+    assert next(excel2vcard.iter_xlsx_rows(path))[0] == '姓'
+    assert list(excel2vcard.read_contact_rows(path)) == [('张', '三', '13800000000')]
+    assert list(excel2vcard.read_contact_rows(path, sheet='其他')) == [('李', '四', '13900000000')]
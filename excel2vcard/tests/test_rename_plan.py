@@ -0,0 +1,91 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import rename_plan
+
+DATE = datetime.datetime(2023, 7, 29, 14, 15, 30)
+
+
+def _make_files(directory, names):
+    for name in names:
+        (directory / name).write_text(name)
+    return [str(directory / name) for name in names]
+
+
+def _drop_trailing_done(journal_path, keep):
+    # 模拟断电：只保留前keep条done记录，后面的记录全部丢失
+    with open(journal_path, encoding='utf-8') as f:
+        lines = f.readlines()
+    kept = []
+    done = 0
+    for line in lines:
+        op = json.loads(line)['op']
+        if op == 'plan':
+            kept.append(line)
+        elif op == 'done' and done < keep:
+            kept.append(line)
+            done += 1
+    with open(journal_path, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+
+
+def test_plan_resolves_collisions_in_memory(tmp_path):
+    paths = _make_files(tmp_path, ['a.jpg', 'b.jpg', '20230729_141530.jpg', 'c.jpg'])
+    plan = rename_plan.plan_renames([(path, DATE) for path in paths], '%Y%m%d_%H%M%S')
+    assert [(os.path.basename(old), os.path.basename(new)) for old, new in plan] == [
+        ('a.jpg', '20230729_141530_1.jpg'),
+        ('b.jpg', '20230729_141530_2.jpg'),
+        ('c.jpg', '20230729_141530_3.jpg'),
+    ]
+
+
+def test_resume_detects_every_unrecorded_rename(tmp_path):
+    names = ['a.jpg', 'b.jpg', 'c.jpg', 'd.jpg']
+    paths = _make_files(tmp_path, names)
+    plan = rename_plan.plan_renames([(path, DATE) for path in paths], '%Y%m%d_%H%M%S')
+    calls = []
+    journal, renamed = rename_plan.apply_plan(plan, should_stop=lambda: calls.append(1) or len(calls) > 3,
+                                              directory=str(tmp_path / 'journals'))
+    assert renamed == 3
+    _drop_trailing_done(journal.path, keep=1)
+
+    assert rename_plan.resume(journal.path) == 1
+    _, states, ended = rename_plan.RenameJournal(journal.path).load()
+    assert ended and all(states[index] == 'done' for index in range(len(plan)))
+
+    restored = []
+    assert rename_plan.undo(journal.path, lambda index, old, new: restored.append(index)) == len(plan)
+    assert restored == list(reversed(range(len(plan))))
+    assert sorted(os.listdir(tmp_path)) == sorted(names + ['journals'])
+
+
+def test_undo_refuses_incomplete_journal(tmp_path):
+    names = ['a.jpg', 'b.jpg', 'c.jpg']
+    paths = _make_files(tmp_path, names)
+    plan = rename_plan.plan_renames([(path, DATE) for path in paths], '%Y%m%d_%H%M%S')
+    journal, _ = rename_plan.apply_plan(plan, directory=str(tmp_path / 'journals'))
+    _drop_trailing_done(journal.path, keep=1)
+
+    # 没有'end'的日志可能属于正在执行的重命名，不能撤销
+    with pytest.raises(ValueError):
+        rename_plan.undo(journal.path)
+    assert rename_plan.resume(journal.path) == 0
+    assert rename_plan.undo(journal.path) == len(plan)
+    assert sorted(os.listdir(tmp_path)) == sorted(names + ['journals'])
+
+
+def test_recover_when_original_name_is_reused(tmp_path):
+    # x -> z 之后 y -> x：第一项的原路径被后面的项占用
+    _make_files(tmp_path, ['x.jpg', 'y.jpg'])
+    plan = [(str(tmp_path / 'x.jpg'), str(tmp_path / 'z.jpg')), (str(tmp_path / 'y.jpg'), str(tmp_path / 'x.jpg'))]
+    journal, renamed = rename_plan.apply_plan(plan, directory=str(tmp_path / 'journals'))
+    assert renamed == 2
+    _drop_trailing_done(journal.path, keep=0)
+
+    assert rename_plan.resume(journal.path) == 0
+    assert rename_plan.undo(journal.path) == 2
+    assert (tmp_path / 'x.jpg').read_text() == 'x.jpg'
+    assert (tmp_path / 'y.jpg').read_text() == 'y.jpg'
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip('vobject')
+
+from excel2vcard import serialize_vcard, serialize_vcard_vobject  # noqa: E402
+
+
+def _padded(prefix_length, target, tail=''):
+    # 让'FN:' + 姓 + ' ' + 名 的长度正好为target个字符（tail放在末尾，落在折行边界上）
+    return 'a' * (target - prefix_length - len(tail)) + tail
+
+
+CASES = [
+    ('张', '三', '13800000000'),
+    ('', '', ''),
+    ('O\'Brien', 'Mary-Ann', '+86 138-0000-0000'),
+    ('逗号,', '分号;', '13800000000'),
+    ('反斜杠\\', '换行\n第二行', '13800000000'),
+    ('回车\r\n', '单独回车\r', '13800000000'),
+    ('欧阳', '小明😀', '13800000000'),
+    ('👨‍👩‍👧', 'émoji ✓', '13800000000'),
+    ('张' * 40, '三' * 40, '13800000000'),
+]
+# 'FN:姓 名'正好74、75、76个字符：不足75个字符的行不折
+for length in (74, 75, 76):
+    CASES.append(('X', _padded(len('FN:X '), length), '13800000000'))
+    # 同样字符数，但末尾为多字节字符，字节数跨过75字节的折行边界
+    for tail in ('中', '中文', 'é', '😀'):
+        CASES.append(('X', _padded(len('FN:X '), length, tail), '13800000000'))
+# 按字节数落在74、75、76字节：ASCII前缀 + 一个三字节字符
+for size in (74, 75, 76):
+    for tail in ('中', '😀'):
+        given = 'b' * (size - len('FN:X ') - len(tail.encode('utf-8'))) + tail + 'c' * 10
+        CASES.append(('X', given, '13800000000'))
+
+
+@pytest.mark.parametrize('family, given, phone', CASES)
+def test_matches_vobject_byte_for_byte(family, given, phone):
+    assert serialize_vcard(family, given, phone).encode('utf-8') == \
+        serialize_vcard_vobject(family, given, phone).encode('utf-8')
+
+
+def test_n_line_folds_like_vobject():
+    # N行比FN行多';;;'，单独覆盖N行跨过边界的情况
+    for length in range(70, 80):
+        given = 'n' * (length - len('N:X;;;;'))
+        assert serialize_vcard('X', given, '1') == serialize_vcard_vobject('X', given, '1')
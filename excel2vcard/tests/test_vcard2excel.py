@@ -0,0 +1,69 @@
+import io
+
+from vcard2excel import iter_contacts, output_writer, write_csv, write_xlsx
+
+VCF = (
+    # vCard 2.1：QUOTED-PRINTABLE软换行跨行，简写参数TEL;CELL;PREF
+    b'BEGIN:VCARD\r\n'
+    b'VERSION:2.1\r\n'
+    b'FN;CHARSET=UTF-8;ENCODING=QUOTED-PRINTABLE:=E5=BC=A0=\r\n'
+    b'=E4=B8=89\r\n'
+    b'TEL;HOME:010-12345678\r\n'
+    b'TEL;CELL;PREF:13800000000\r\n'
+    b'END:VCARD\r\n'
+    # vCard 3.0：LF换行，FN折行，照片跳过，转义字符
+    b'BEGIN:VCARD\n'
+    b'VERSION:3.0\n'
+    b'FN:O\\,Brien Mary\n'
+    b'  Ann\n'
+    b'PHOTO;ENCODING=b;TYPE=JPEG:QUFB\n'
+    b' QUFB\n'
+    b'item1.TEL;TYPE=WORK:+86 139-0000-0000\n'
+    b'END:VCARD\n'
+    # 没有FN时用N按姓在前拼出姓名：中文不加空格，英文加空格
+    b'BEGIN:VCARD\r\n'
+    b'N:\xe6\xac\xa7\xe9\x98\xb3;\xe5\xb0\x8f\xe6\x98\x8e;;;\r\n'
+    b'END:VCARD\r\n'
+    b'BEGIN:VCARD\r\n'
+    b'N:Smith;John;;;\r\n'
+    b'TEL:\r\n'
+    b'END:VCARD'
+)
+
+
+def test_iter_contacts_handles_encodings_folding_and_fallbacks():
+    assert list(iter_contacts(io.BytesIO(VCF))) == [
+        {'Name': '张三', 'Phone': '13800000000, 010-12345678'},
+        {'Name': 'O,Brien Mary Ann', 'Phone': '+86 139-0000-0000'},
+        {'Name': '欧阳小明', 'Phone': ''},
+        {'Name': 'Smith John', 'Phone': ''},
+    ]
+
+
+def test_iter_contacts_skips_lines_outside_vcards():
+    lines = [b'TEL:13800000000\r\n', b'BEGIN:VCARD\r\n', b'FN:\xe6\x9d\x8e\xe5\x9b\x9b\r\n', b'END:VCARD\r\n']
+    assert list(iter_contacts(lines)) == [{'Name': '李四', 'Phone': ''}]
+
+
+def test_soft_breaks_of_skipped_properties_are_not_parsed():
+    # 跳过的NOTE/ADR的QUOTED-PRINTABLE续行看起来像属性，不能当成电话、姓名或名片结束
+    lines = [
+        b'BEGIN:VCARD\r\n',
+        b'FN:\xe6\x9d\x8e\xe5\x9b\x9b\r\n',
+        b'NOTE;ENCODING=QUOTED-PRINTABLE:call=\r\n',
+        b'TEL:13900000000=\r\n',
+        b'END:VCARD\r\n',
+        b'ADR;QUOTED-PRINTABLE:;;street=\r\n',
+        b'FN:someone else\r\n',
+        b'TEL;CELL:13800000000\r\n',
+        b'END:VCARD\r\n',
+    ]
+    assert list(iter_contacts(lines)) == [{'Name': '李四', 'Phone': '13800000000'}]
+
+
+def test_output_writer_picks_format_by_extension():
+    assert output_writer('contacts.XLSX') is write_xlsx
+    assert output_writer('contacts.csv') is write_csv
+    assert output_writer('contacts.txt') is write_csv
+    assert output_writer('-') is write_csv
+    assert output_writer('contacts.csv', 'xlsx') is write_xlsx
@@ -1,43 +1,223 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import pandas as pd
+import argparse
+import base64
+import csv
+import io
+import logging
+import quopri
+import re
+import sys
+
+# 只保留需要的属性，照片等大字段直接跳过，不占内存
+WANTED_PROPERTIES = {'FN', 'N', 'TEL'}
+COLUMNS = ['Name', 'Phone']
+# xlsx单个工作表最多1048576行（含表头）
+MAX_SHEET_ROWS = 1048575
+BARE_ENCODINGS = {'QUOTED-PRINTABLE', 'BASE64', '8BIT', '7BIT'}
+
+_ESCAPED = re.compile(r'\\(.)')
+_FIELD_SEPARATOR = re.compile(r'(?<!\\);')
+
+def _unescape(value):
+    # vCard文本转义：\n换行，\, \; \\原样
+    return _ESCAPED.sub(lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+def _parse_property(line):
+    """拆出属性名和参数：b'item1.TEL;TYPE=CELL;CHARSET=UTF-8' -> ('TEL', {'TYPE': ['CELL'], 'CHARSET': ['UTF-8']})"""
+    name, *raw_params = line.decode('ascii', errors='replace').split(';')
+    params = {}
+    for raw_param in raw_params:
+        key, sep, value = raw_param.partition('=')
+        if not sep:
+            # vCard 2.1的简写参数，如TEL;CELL;PREF、FN;QUOTED-PRINTABLE
+            key, value = 'ENCODING' if key.upper() in BARE_ENCODINGS else 'TYPE', key
+        key = key.upper()
+        if key == 'ENCODING':
+            value = value.upper()
+        params.setdefault(key, []).extend(value.strip('"').split(','))
+    return name.rpartition('.')[2].upper(), params
+
+def _decode_value(raw, params):
+    # 先按ENCODING解码，再按CHARSET转成文本，默认UTF-8
+    encoding = params.get('ENCODING', [''])[0]
+    if encoding in ('QUOTED-PRINTABLE', 'QP'):
+        raw = quopri.decodestring(raw)
+    elif encoding in ('B', 'BASE64'):
+        raw = base64.b64decode(raw)
+    charset = params.get('CHARSET', ['utf-8'])[0]
+    try:
+        return raw.decode(charset, errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
+def iter_properties(lines):
+    """把原始字节行合并成属性，处理CRLF、折叠行和QUOTED-PRINTABLE软换行，生成(属性名, 参数, 原始值)"""
+    current = None  # [属性名, 参数, 值片段列表]，不需要的属性值片段为None
+    tail = b''  # 当前属性最后一行的值；不需要的属性也要记下，否则其软换行的续行会被当成新属性
+    for line in lines:
+        line = line.rstrip(b'\r\n')
+        if current is not None:
+            parts = current[2]
+            if line[:1] in (b' ', b'\t'):
+                # 折叠行：去掉开头的一个空白后接到上一行
+                tail = line[1:]
+                if parts is not None:
+                    parts.append(tail)
+                continue
+            if tail.endswith(b'=') and 'QUOTED-PRINTABLE' in current[1].get('ENCODING', []):
+                # QUOTED-PRINTABLE软换行：行尾的'='表示下一行是续行
+                tail = line
+                if parts is not None:
+                    parts[-1] = parts[-1][:-1]
+                    parts.append(line)
+                continue
+            if parts is not None:
+                yield current[0], current[1], b''.join(parts)
+            current = None
+        if not line:
+            continue
+        head, sep, value = line.partition(b':')
+        if not sep:
+            continue
+        name, params = _parse_property(head)
+        wanted = name in WANTED_PROPERTIES or name in ('BEGIN', 'END')
+        current = [name, params, [value] if wanted else None]
+        tail = value
+    if current is not None and current[2] is not None:
+        yield current[0], current[1], b''.join(current[2])
+
+def iter_contacts(lines):
+    """逐个生成联系人{'Name', 'Phone'}；没有FN时用N拼出姓名，多个电话用逗号分隔"""
+    contact = None
+    for name, params, raw in iter_properties(lines):
+        if name == 'BEGIN' and raw.strip().upper() == b'VCARD':
+            contact = {'FN': None, 'N': None, 'TEL': []}
+        elif contact is None:
+            continue
+        elif name == 'END' and raw.strip().upper() == b'VCARD':
+            display_name = contact['FN']
+            if not display_name and contact['N']:
+                family, given = (contact['N'] + ['', ''])[:2]
+                # 中文姓名姓在前且不加空格
+                separator = ' ' if (family + given).isascii() else ''
+                display_name = separator.join(part for part in (family, given) if part)
+            yield {'Name': display_name or '', 'Phone': ', '.join(contact['TEL'])}
+            contact = None
+        elif name == 'FN':
+            contact['FN'] = _unescape(_decode_value(raw, params)).strip()
+        elif name == 'N':
+            value = _decode_value(raw, params)
+            contact['N'] = [_unescape(field).strip() for field in _FIELD_SEPARATOR.split(value)]
+        elif name == 'TEL':
+            tel = _decode_value(raw, params).strip()
+            if tel:
+                # 首选号码排在最前面
+                if 'PREF' in (value.upper() for value in params.get('TYPE', [])):
+                    contact['TEL'].insert(0, tel)
+                else:
+                    contact['TEL'].append(tel)
+
+def write_csv(contacts, path, header=COLUMNS):
+    # utf-8-sig让Excel直接识别中文；path为'-'时写到标准输出（不带BOM）
+    count = 0
+    if path == '-':
+        f = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+    else:
+        f = open(path, 'w', encoding='utf-8-sig', newline='')
+    try:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for contact in contacts:
+            writer.writerow([contact[column] for column in COLUMNS])
+            count += 1
+    finally:
+        f.flush()
+        if path == '-':
+            f.detach()  # 不关闭标准输出
+        else:
+            f.close()
+    return count
+
+def write_xlsx(contacts, path, header=COLUMNS):
+    # 只写模式逐行落盘，超过单表行数上限时自动新建工作表；path为'-'时写到标准输出
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = None
+    count = 0
+    for contact in contacts:
+        if count % MAX_SHEET_ROWS == 0:
+            sheet = workbook.create_sheet(f'contacts{count // MAX_SHEET_ROWS + 1}' if count else 'contacts')
+            sheet.append(list(header))
+        sheet.append([contact[column] for column in COLUMNS])
+        count += 1
+    if sheet is None:
+        workbook.create_sheet('contacts').append(list(header))
+    if path == '-':
+        # xlsx是zip格式，需要先在内存中生成
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        sys.stdout.buffer.write(buffer.getvalue())
+        sys.stdout.buffer.flush()
+    else:
+        workbook.save(path)
+    return count
+
+def iter_files_contacts(inputs):
+    # 依次读取多个VCF文件的联系人，'-'为标准输入
+    for vcf_file in inputs:
+        if vcf_file == '-':
+            yield from iter_contacts(sys.stdin.buffer)
+        else:
+            with open(vcf_file, 'rb') as file:
+                yield from iter_contacts(file)
+
+def output_writer(path, output_format=None):
+    """按输出格式选择写入函数；output_format为'xlsx'或'csv'，默认扩展名为.xlsx时写xlsx，
+    其他扩展名和标准输出('-')写csv"""
+    if output_format is None:
+        output_format = 'xlsx' if path.lower().endswith('.xlsx') else 'csv'
+    return write_xlsx if output_format == 'xlsx' else write_csv
+
+def convert(inputs, output, header=COLUMNS, output_format=None):
+    """把多个VCF依次转换写入同一个文件，返回联系人数，输出格式见output_writer"""
+    return output_writer(output, output_format)(iter_files_contacts(inputs), output, header)
 
 def vcard_to_excel(vcf_file_path, excel_file_path):
-    # 读取VCF文件，明确指定使用UTF-8编码
-    with open(vcf_file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-
-    # 分割vCard条目
-    vcard_entries = content.split('END:VCARD\n')
-
-    # 初始化一个列表来存储联系人信息
-    contacts = []
-
-    # 遍历每个vCard条目
-    for entry in vcard_entries:
-        if entry:
-            # 提取姓名
-            name_start = entry.find('FN:')
-            if name_start != -1:
-                name_end = entry.find('\n', name_start)
-                name = entry[name_start + 3:name_end].strip()
-
-            # 提取电话号码
-            tel_start = entry.find('TEL;')
-            if tel_start != -1:
-                tel_end = entry.find('\n', tel_start)
-                tel = entry[tel_start + entry[tel_start:].find(':') + 1:tel_end].strip()
-
-            # 将联系人信息添加到列表
-            contacts.append({'Name': name, 'Phone': tel})
-
-    # 创建DataFrame
-    df = pd.DataFrame(contacts)
-
-    # 写入Excel文件
-    df.to_excel(excel_file_path, index=False)
+    """流式转换VCF，输出按扩展名选择xlsx或csv，返回联系人数"""
+    with open(vcf_file_path, 'rb') as file:
+        count = output_writer(excel_file_path)(iter_contacts(file), excel_file_path)
+    logging.info(f"转换完成，共 {count} 个联系人，保存在 {excel_file_path}")
+    return count
+
+def main(argv=None):
+    from excel2vcard import expand_inputs
+
+    parser = argparse.ArgumentParser(description="vCard联系人转Excel/CSV，不带参数时打开图形界面")
+    parser.add_argument('inputs', nargs='*', help="vcf文件、目录或通配符，'-'为标准输入")
+    parser.add_argument('-o', '--output', default='contacts.xlsx', help="输出文件，'-'为标准输出")
+    parser.add_argument('--format', choices=['xlsx', 'csv'], help="输出格式，默认按扩展名判断")
+    parser.add_argument('--name-column', default=COLUMNS[0], help="姓名列的表头")
+    parser.add_argument('--phone-column', default=COLUMNS[1], help="电话列的表头")
+    args = parser.parse_args(argv)
+
+    if not args.inputs:
+        select_file_and_directory()
+        return 0
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    inputs = expand_inputs(args.inputs, ('.vcf',))
+    if not inputs:
+        parser.error("没有找到输入文件")
+    try:
+        count = convert(inputs, args.output, [args.name_column, args.phone_column], args.format)
+    except OSError as e:
+        logging.error(f"转换失败: {e}")
+        return 1
+    logging.info(f"转换完成，共 {count} 个联系人，输出 {args.output}")
+    return 0
 
 def select_file_and_directory():
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     # 创建一个Tkinter窗口
     root = tk.Tk()
     root.withdraw()  # 隐藏主窗口
@@ -70,4 +250,4 @@ def select_file_and_directory():
 
 # 运行主函数
 if __name__ == "__main__":
-    select_file_and_directory()
+    sys.exit(main())
@@ -0,0 +1,21 @@
+# 生产部署：在本目录执行 gunicorn shuangseqiu:app（gunicorn会自动读取本文件）
+# gevent worker里每个连接是一个协程而不是一个线程，/generate/stream的慢客户端不会占满线程池
+import multiprocessing
+import os
+
+bind = os.environ.get('SSQ_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('SSQ_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gevent'
+# 每个worker同时处理的连接数
+worker_connections = int(os.environ.get('SSQ_WORKER_CONNECTIONS', 1000))
+# 流式响应按时间预算结束，worker超时要大于最大预算
+timeout = int(float(os.environ.get('SSQ_MAX_STREAM_BUDGET', 60))) + 30
+
+# 流式生成的并发上限跟随连接数，不再按线程数限制
+os.environ.setdefault('SSQ_MAX_STREAMS', str(worker_connections))
+
+
+def post_worker_init(worker):
+    # gevent下后台线程也是协程，全量红球索引在开始接受请求前构建，不在服务期间占住事件循环
+    from ssq_sampler import get_index
+    get_index()
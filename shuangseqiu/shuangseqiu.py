@@ -1,90 +1,102 @@
-from flask import Flask, jsonify, request, render_template, send_file
+from flask import Flask, Response, g, jsonify, request, render_template, send_file
+import datetime
+import hashlib
+import json
+import logging
+import os
 import random
-import requests
-from lxml import html
+import threading
+import time
+from concurrent.futures import TimeoutError as FetchTimeout
+from contextlib import contextmanager
+from functools import partial
 from collections import Counter
+from ssq_batch import batch_to_records, generate_batch, generate_parallel
+from ssq_cache import TTLCache
+from ssq_http import CWL_BASE, CZ89_BASE, fetch_concurrently, get as http_get
+from ssq_metrics import CallbackCounter, parse_seconds, request_seconds, sampling_attempts, sampling_failures, \
+    tickets_generated, render as render_metrics
+from ssq_parser import parse_trend_table
+from ssq_rng import TicketRng, parse_seed
+from ssq_sampler import SUM_BUCKETS, SUM_WEIGHTS, get_index
+from ssq_stats import DIMENSIONS, StatsEngine
+from ssq_store import DEFAULT_DB_PATH, DrawStore, fetch_draw_page
 
 app = Flask(__name__)
 
-# 实时获取区间比、奇偶的概率
-def ssq_interval_parity_data():
-    # 请求网页
-    url = "https://m.cz89.com/zst/ssq?pagesize=120"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  # 确保请求成功
-
-    # 解析HTML
-    tree = html.fromstring(response.text)
-
-    # 定义XPath表达式
-    interval_xpath = "/html/body/div[2]/div/div/div[2]/div[2]/table/tbody[1]/tr[{}]/td[60]"
-    parity_xpath = "/html/body/div[2]/div/div/div[2]/div[2]/table/tbody[1]/tr[{}]/td[61]"
-
-    # 提取所有需要的数据
-    data = []
-    second_data = []
-    for i in range(1, 121):  # tr[1] 到 tr[120]
-        path = interval_xpath.format(i)
-        second_path = parity_xpath.format(i)
-        value = tree.xpath(path)
-        second_value = tree.xpath(second_path)
-        if value and second_value:  # 如果找到元素
-            data.append(value[0].text_content().strip())
-            second_data.append(second_value[0].text_content().strip())
-
-    # 使用Counter统计元素出现次数
-    counter = Counter(data)
-    second_counter = Counter(second_data)
-
-    # 计算总数量
-    total = sum(counter.values())
-    second_total = sum(second_counter.values())
-
-    # 创建列表来存储结果
-    items_str = []
-    percentages = []
-    second_items_str = []
-    second_percentages = []
-
-    # 计算每个元素及其出现的次数和百分比
-    for item, count in counter.items():
-        items_str.append(item)
-        percentage = (count / total) * 1
-        percentages.append(percentage)
-
-    for second_item, second_count in second_counter.items():
-        second_items_str.append(second_item)
-        second_percentage = (second_count / second_total) * 1
-        second_percentages.append(second_percentage)
-
-    # 将items_str中的每个元素转换为整数列表
-    items_int = [list(map(int, item.split(':'))) for item in items_str]
-    second_items_int = [list(map(int, item.split(':'))) for item in second_items_str]
+# 上游数据缓存时间（秒），可通过环境变量调整
+CACHE_TTL = int(os.environ.get('SSQ_CACHE_TTL', 600))
+# 设置后从本地目录读取上游页面（ssq.html、lqzs.html、draws.json），用于离线测试
+FIXTURE_DIR = os.environ.get('SSQ_FIXTURE_DIR')
+# /generate?count=N 单次最多生成的注数
+MAX_BATCH_COUNT = int(os.environ.get('SSQ_MAX_COUNT', 100000))
+# 本地开奖历史库；离线模式下不做任何网络同步
+DB_PATH = os.environ.get('SSQ_DB_PATH', DEFAULT_DB_PATH)
+OFFLINE = os.environ.get('SSQ_OFFLINE') == '1'
+SYNC_INTERVAL = int(os.environ.get('SSQ_SYNC_INTERVAL', 3600))
+# 统计使用的最近期数，默认与走势页的120期一致
+STATS_WINDOW = int(os.environ.get('SSQ_STATS_WINDOW', 120))
+# /generate/stream 的注数上限和时间预算（秒）
+MAX_STREAM_COUNT = int(os.environ.get('SSQ_MAX_STREAM_COUNT', 1000000))
+DEFAULT_STREAM_BUDGET = float(os.environ.get('SSQ_STREAM_BUDGET', 5))
+MAX_STREAM_BUDGET = float(os.environ.get('SSQ_MAX_STREAM_BUDGET', 60))
+# 流式生成每批的注数，批越小首注越快
+STREAM_CHUNK = 256
+# 同时进行的流式生成数，超过上限时返回503；gunicorn.conf.py的gevent worker下按连接数放宽
+MAX_CONCURRENT_STREAMS = int(os.environ.get('SSQ_MAX_STREAMS', 8))
+# /stats 允许客户端和代理直接使用缓存的秒数，过期后用ETag重新验证
+STATS_MAX_AGE = int(os.environ.get('SSQ_STATS_MAX_AGE', 300))
+
+data_cache = TTLCache(ttl=CACHE_TTL)
+draw_store = DrawStore(DB_PATH)
+stats_engine = StatsEngine(STATS_WINDOW)
+stream_slots = threading.BoundedSemaphore(MAX_CONCURRENT_STREAMS)
+stats_engine.load(draw_store.recent_draws(STATS_WINDOW))
+
+CallbackCounter('ssq_cache_events_total', '上游数据缓存事件次数', 'event',
+                lambda: {event: count for event, count in data_cache.stats().items()
+                         if event in ('hits', 'stale_hits', 'misses', 'coalesced', 'refreshes', 'errors',
+                                      'discarded')})
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def scrape_trend_columns(url, fixture_name, columns):
+    # 单次遍历走势表读取指定列；页面不大，整页下载后解析比边下载边解析更快
+    with parse_seconds.time(page=fixture_name):
+        if FIXTURE_DIR:
+            return parse_trend_table(read_fixture(fixture_name), columns)
+        response = http_get(url)
+        response.raise_for_status()  # 确保请求成功
+        return parse_trend_table(response.content, columns)
+
+
+def split_ratio(value):
+    # '3:1:2' -> (3, 1, 2)
+    return tuple(map(int, value.split(':')))
 
-    # 对items_int和percentages进行排序
-    sorted_results = sorted(zip(items_int, percentages), key=lambda x: x[0])
-    items_sorted, percentages_sorted = zip(*sorted_results)
 
-    # 对second_items_int和second_percentages进行排序
-    second_sorted_results = sorted(zip(second_items_int, second_percentages), key=lambda x: x[0])
-    second_items_sorted, second_percentages_sorted = zip(*second_sorted_results)
-
-    # 将items_sorted和percentages_sorted转换为列表
-    items_sorted = list(items_sorted)
-    percentages_sorted = list(percentages_sorted)
-    second_items_sorted = list(second_items_sorted)
-    second_percentages_sorted = list(second_percentages_sorted)
-
-    return [items_sorted, percentages_sorted], [second_items_sorted, second_percentages_sorted]
+# 实时获取区间比、奇偶的概率
+def ssq_interval_parity_data():
+    url = f"{CZ89_BASE}/zst/ssq?pagesize=120"
+    rows = scrape_trend_columns(url, 'ssq.html', (60, 61))
+    intervals = [split_ratio(interval) for interval, _ in rows]
+    parities = [split_ratio(parity) for _, parity in rows]
+    return distribution(intervals), distribution(parities)
 
 
 def fetch_red_balls():
-    url = "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=ssq&issueCount=&issueStart=&issueEnd=&dayStart=&dayEnd=&pageNo=1&pageSize=30&week=&systemType=PC"
+    url = f"{CWL_BASE}/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=ssq&issueCount=&issueStart=&issueEnd=&dayStart=&dayEnd=&pageNo=1&pageSize=30&week=&systemType=PC"
+
+    if FIXTURE_DIR:
+        data = json.loads(read_fixture('draws.json'))
+        return [int(ball) for ball in data['result'][0]['red'].split(',')]
 
     # 发送GET请求
-    response = requests.get(url)
+    response = http_get(url)
 
     # 检查响应状态码是否为200（成功）
     if response.status_code == 200:
@@ -103,108 +115,37 @@ def fetch_red_balls():
         return None
 
 
-def generate_numbers(items_sorted, percentages_sorted, second_items_sorted, second_percentages_sorted):
-    sections = [(1, 11), (12, 22), (23, 33)]
-    # 区间比例定义
-    ratios = random.choices(items_sorted, weights=percentages_sorted, k=1)[0]
-
-    picked_numbers = []
-    total_sum = 0
-
-    odd_even_ratio = random.choices(second_items_sorted, weights=second_percentages_sorted, k=1)[0]
-    required_odds, required_evens = odd_even_ratio
-    total_sum_list = [(40, 49), (50, 59),
-                      (60, 69), (70, 79), (80, 89),
-                      (90, 99), (100, 109), (110, 119),
-                      (120, 129), (130, 139), (140, 149)]
-    total_sum_weights = [0.01, 0.01, 0.06, 0.10, 0.11, 0.20, 0.14, 0.21, 0.11, 0.02, 0.03]
-    total_sum_result = random.choices(total_sum_list, weights=total_sum_weights, k=1)[0]
-    start, end = total_sum_result
-    attempt = 0  # 记录循环次数
-    while not start <= total_sum <= end or len([num for num in picked_numbers if num % 2 != 0]) != required_odds or len(
-            [num for num in picked_numbers if num % 2 == 0]) != required_evens:
-        picked_numbers.clear()
-        total_sum = 0
-        if attempt == 500:  # 如果循环500次没有符合的数据就跳出
-            break
-        for ratio, section in zip(ratios, sections):
-            for _ in range(ratio):
-                # 选择奇数或偶数
-                if len([num for num in picked_numbers if num % 2 != 0]) < required_odds and random.choice(
-                        [True, False]):
-                    # 选择奇数
-                    num = random.choice([n for n in range(section[0], section[1] + 1) if n % 2 != 0])
-                else:
-                    # 选择偶数
-                    num = random.choice([n for n in range(section[0], section[1] + 1) if n % 2 == 0])
-
-                # 确保不重复
-                while num in picked_numbers:
-                    num = random.choice([n for n in range(section[0], section[1] + 1) if
-                                         n % 2 != 0]) if num % 2 != 0 else random.choice(
-                        [n for n in range(section[0], section[1] + 1) if n % 2 == 0])
-
-                picked_numbers.append(num)
-                total_sum += num
-        attempt += 1  # 新增：循环次数加1
-
-    return picked_numbers, total_sum, ratios, odd_even_ratio
+def generate_numbers(items_sorted, percentages_sorted, second_items_sorted, second_percentages_sorted,
+                     index=None, consecutive=None, sum_table=None, rng=random, span_table=None):
+    # index为红球组合索引，默认全量；consecutive为False时只取不含连号的组合；sum_table为[和值区间, 权重]
+    # span_table为[跨度区间, 权重]，默认跨度不限；rng为random.Random实例，传入TicketRng.random可按种子复现
+    if index is None:
+        index = get_index()
+    if sum_table is None:
+        sum_table = [SUM_BUCKETS, SUM_WEIGHTS]
 
+    # 按区间比、奇偶比、和值区间、跨度区间的联合权重选一个有解的分组，再在组内等概率抽取
+    groups, cum_weights = index.joint_table([items_sorted, percentages_sorted],
+                                            [second_items_sorted, second_percentages_sorted],
+                                            sum_table, consecutive, span_table)
+    sampling_attempts.inc(mode='single')
+    if not groups:
+        sampling_failures.inc(mode='single')
+        raise ValueError("没有满足条件的红球组合")
+    ratios, odd_even_ratio, sum_range, span_range = rng.choices(groups, cum_weights=cum_weights, k=1)[0]
+    picked_numbers = index.sample(ratios, odd_even_ratio[0], sum_range, consecutive, span_range, rng=rng)
 
-def ssq_blue_data():
-    # 请求网页
-    url = "https://m.cz89.com/zst/ssq/lqzs.htm?pagesize=120"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  # 确保请求成功
-
-    # 解析HTML
-    tree = html.fromstring(response.text)
-
-    # 定义XPath表达式
-    interval_xpath = "/html/body/div[2]/div/div/div[2]/div[2]/table/tbody[1]/tr[{}]/td[11]"
-
-    # 提取所有需要的数据
-    data = []
-    for i in range(1, 121):  # tr[1] 到 tr[120]
-        path = interval_xpath.format(i)
-        value = tree.xpath(path)
-        if value:  # 如果找到元素
-            data.append(value[0].text_content().strip())
-
-    # 使用Counter统计元素出现次数
-    counter = Counter(data)
-
-    # 计算总数量
-    total = sum(counter.values())
+    return picked_numbers, sum(picked_numbers), ratios, odd_even_ratio
 
-    # 创建列表来存储结果
-    items_str = []  # 使用字符串列表收集原始数据
-    percentages = []
 
-    # 计算每个元素及其出现的次数和百分比
-    for item, count in counter.items():
-        items_str.append(item)  # 收集原始字符串
-        percentage = (count / total) * 1
-        percentages.append(percentage)
-
-    # 将items_str中的每个元素转换为整数列表
-    items_int = [list(map(int, item.split(':'))) for item in items_str]
-
-    # 对items_int和percentages进行排序
-    sorted_results = sorted(zip(items_int, percentages), key=lambda x: x[0])
-    items_sorted, percentages_sorted = zip(*sorted_results)
-
-    # 将items_sorted和percentages_sorted转换为列表
-    items_sorted = list(items_sorted)
-    percentages_sorted = list(percentages_sorted)
-
-    return [items_sorted, percentages_sorted]
+def ssq_blue_data():
+    url = f"{CZ89_BASE}/zst/ssq/lqzs.htm?pagesize=120"
+    rows = scrape_trend_columns(url, 'lqzs.html', (11,))
+    return distribution(split_ratio(value) for value, in rows)
 
 
-def back_random_nums(blue_proportion, interval_weights):
-    nums = random.choices(blue_proportion, weights=interval_weights, k=1)[0]
+def back_random_nums(blue_proportion, interval_weights, rng=random):
+    nums = rng.choices(blue_proportion, weights=interval_weights, k=1)[0]
     return nums
 
 
@@ -216,51 +157,310 @@ def has_consecutive_numbers(numbers):
     return False
 
 
+def load_red_balls():
+    red_balls = fetch_red_balls()
+    if red_balls is None:
+        # 不缓存失败结果
+        raise RuntimeError("获取上期开奖号码失败")
+    return red_balls
+
+
+def distribution(values):
+    # 统计每个取值出现的比例，按取值排序后返回[取值列表, 比例列表]
+    counter = Counter(values)
+    total = sum(counter.values())
+    items_sorted = sorted(counter)
+    return [[list(item) for item in items_sorted], [counter[item] / total for item in items_sorted]]
+
+
+def sync_draws():
+    if OFFLINE:
+        return 0
+    added = draw_store.sync(partial(fetch_draw_page, fixture_dir=FIXTURE_DIR))
+    if added:
+        # 统计只做增量更新
+        stats_engine.add_draws(draw_store.recent_draws(added)[::-1])
+        data_cache.invalidate()
+    return added
+
+
+def sync_forever():
+    while True:
+        try:
+            sync_draws()
+        except Exception as e:
+            logging.error(f"同步开奖数据失败: {e}")
+        time.sleep(SYNC_INTERVAL)
+
+
+# 数据提供层：优先用本地开奖库的统计，库为空时退回抓取上游页面，统一走缓存
+def get_interval_parity_data():
+    if len(stats_engine):
+        tables = stats_engine.tables()
+        return tables['interval'], tables['parity']
+    return data_cache.get('interval_parity', ssq_interval_parity_data)
+
+
+def get_blue_data():
+    if len(stats_engine):
+        return stats_engine.tables()['blue']
+    return data_cache.get('blue', ssq_blue_data)
+
+
+def get_sum_table():
+    # 没有开奖历史时使用默认的和值权重
+    if len(stats_engine):
+        return stats_engine.tables()['sum']
+    return [SUM_BUCKETS, SUM_WEIGHTS]
+
+
+def get_span_table():
+    # 跨度分布只来自本地开奖库，没有开奖历史时跨度不限
+    if len(stats_engine):
+        return stats_engine.tables()['span']
+    return None
+
+
+def get_red_balls():
+    latest_draw = draw_store.latest_draw()
+    if latest_draw:
+        return latest_draw['red']
+    return data_cache.get('red_balls', load_red_balls)
+
+
+@contextmanager
+def stage(name):
+    # 记录请求内某个阶段的耗时，写入Server-Timing响应头
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.timings[name] = time.perf_counter() - start
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    g.timings = {}
+
+
+@app.after_request
+def record_timing(response):
+    elapsed = time.perf_counter() - g.request_start
+    request_seconds.observe(elapsed, endpoint=request.endpoint or 'unknown', status=response.status_code)
+    g.timings['total'] = elapsed
+    response.headers['Server-Timing'] = ', '.join(f'{name};dur={seconds * 1000:.2f}'
+                                                  for name, seconds in g.timings.items())
+    return response
+
+
 @app.route('/')
 def home():
     return render_template('index.html')
 
 
+def request_rng():
+    # ?seed=N 复现某次结果；不传时随机，实际种子通过X-Seed响应头返回
+    try:
+        return TicketRng(parse_seed(request.args.get('seed')))
+    except ValueError:
+        return None
+
+
 @app.route('/generate', methods=['GET'])
 def generate():
-    blue_proportion, interval_weights = ssq_blue_data()
-    interval_data, parity_data = ssq_interval_parity_data()
+    ticket_rng = request_rng()
+    if ticket_rng is None:
+        return jsonify({"error": "seed必须是非负整数"}), 400
+    # 三个数据源并发获取，冷缓存时耗时约等于最慢的一个
+    with stage('data'):
+        data = fetch_concurrently({'blue': get_blue_data, 'interval_parity': get_interval_parity_data,
+                                   'red_balls': get_red_balls})
+    blue_proportion, interval_weights = data['blue']
+    interval_data, parity_data = data['interval_parity']
+    period = data['red_balls']
     items_sorted, percentages_sorted = interval_data
     second_items_sorted, second_percentages_sorted = parity_data
+    sum_table = get_sum_table()
+    span_table = get_span_table()
+
+    # 只在与上期恰好有一个重号、且不含连号的组合中抽取，不再反复重试
+    with stage('index'):
+        index = get_index(period)
+
+    if 'count' in request.args:
+        # 批量模式：整批向量化生成
+        count = request.args.get('count', type=int)
+        if count is None or not 0 < count <= MAX_BATCH_COUNT:
+            return jsonify({"error": f"count必须是1到{MAX_BATCH_COUNT}之间的整数"}), 400
+        with stage('sample'):
+            batch = generate_parallel(count, interval_data, parity_data, [blue_proportion, interval_weights],
+                                      index=index, consecutive=False, sum_table=sum_table, ticket_rng=ticket_rng,
+                                      span_table=span_table)
+        sampling_attempts.inc(count, mode='batch')
+        tickets_generated.inc(count, mode='batch')
+        response = jsonify(batch_to_records(batch, period))
+        response.headers['X-Seed'] = str(ticket_rng.seed)
+        return response
 
     results = []
-    count = 0
-    while count < 10:
+    sample_start = time.perf_counter()
+    for _ in range(10):
+        back = back_random_nums(blue_proportion, interval_weights, rng=ticket_rng.random)
+        numbers, total_sum, ratios, odd_even_ratio = generate_numbers(items_sorted, percentages_sorted,
+                                                                      second_items_sorted, second_percentages_sorted,
+                                                                      index=index, consecutive=False,
+                                                                      sum_table=sum_table, rng=ticket_rng.random,
+                                                                      span_table=span_table)
+        span = max(numbers) - min(numbers)
+        common_elements = set(period).intersection(numbers)
+        result = {
+            "red_balls": sorted(numbers),
+            "blue_ball": sorted(back),
+            "span": span,
+            "total_sum": total_sum,
+            "ratios": ratios,
+            "odd_even_ratio": odd_even_ratio,
+            "common_elements": list(common_elements)  # 将 set 转换为 list
+        }
+        results.append(result)
+    g.timings['sample'] = time.perf_counter() - sample_start
+    tickets_generated.inc(len(results), mode='single')
+
+    response = jsonify(results)
+    response.headers['X-Seed'] = str(ticket_rng.seed)
+    return response
+
+
+@app.route('/generate/stream', methods=['GET'])
+def generate_stream():
+    # 边生成边输出：默认NDJSON，每行一注；format=sse或Accept: text/event-stream时输出SSE事件
+    # 按gunicorn.conf.py用gevent worker部署时每个流是一个协程，每批之后让出，许多客户端共用一个worker；
+    # app.run等线程模式下每个流占用一个线程，由SSQ_MAX_STREAMS限制，满了返回503和Retry-After
+    # 不给type转换默认值：格式错误时get返回None，由下面的检查返回400
+    count = request.args.get('count', type=int) if 'count' in request.args else 10
+    budget = request.args.get('budget', type=float) if 'budget' in request.args else DEFAULT_STREAM_BUDGET
+    ticket_rng = request_rng()
+    if ticket_rng is None:
+        return jsonify({"error": "seed必须是非负整数"}), 400
+    if count is None or not 0 < count <= MAX_STREAM_COUNT:
+        return jsonify({"error": f"count必须是1到{MAX_STREAM_COUNT}之间的整数"}), 400
+    if budget is None or not 0 < budget <= MAX_STREAM_BUDGET:
+        return jsonify({"error": f"budget必须是0到{MAX_STREAM_BUDGET}之间的秒数"}), 400
+    sse = request.args.get('format') == 'sse' or request.accept_mimetypes.best == 'text/event-stream'
+
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({"error": f"同时进行的流式生成已达上限{MAX_CONCURRENT_STREAMS}，请稍后重试"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    released = threading.Lock()
+
+    def release_slot():
+        # 生成器结束和响应关闭都会调用，只释放一次
+        if released.acquire(blocking=False):
+            stream_slots.release()
+
+    # 时间预算从收到请求开始算，上游数据也必须在预算内拿到
+    deadline = time.monotonic() + budget
+    try:
+        with stage('data'):
+            data = fetch_concurrently({'blue': get_blue_data, 'interval_parity': get_interval_parity_data,
+                                       'red_balls': get_red_balls}, timeout=budget)
+        interval_data, parity_data = data['interval_parity']
+        period = data['red_balls']
+        sum_table = get_sum_table()
+        span_table = get_span_table()
+        with stage('index'):
+            index = get_index(period)
+    except FetchTimeout:
+        release_slot()
+        return jsonify({"error": "获取上游数据超出时间预算"}), 503
+    except Exception:
+        release_slot()
+        raise
+
+    def encode(record, event='ticket'):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        return f'event: {event}\ndata: {line}\n\n' if sse else line + '\n'
+
+    def tickets():
+        # 客户端断开时服务器关闭生成器，循环在下一次yield处结束
+        sent = 0
         try:
-            back = back_random_nums(blue_proportion, interval_weights)
-            numbers, total_sum, ratios, odd_even_ratio = generate_numbers(items_sorted, percentages_sorted,
-                                                                          second_items_sorted, second_percentages_sorted)
-            has_numbers = has_consecutive_numbers(numbers)
-            max_value = max(numbers)
-            min_value = min(numbers)
-            span = max_value - min_value
-            period = fetch_red_balls()
-            set1 = set(period)
-            set2 = set(numbers)
-            common_elements = set1.intersection(set2)
-            if len(common_elements) == 1:
-                if not has_numbers:
-                    result = {
-                        "red_balls": sorted(numbers),
-                        "blue_ball": sorted(back),
-                        "span": span,
-                        "total_sum": total_sum,
-                        "ratios": ratios,
-                        "odd_even_ratio": odd_even_ratio,
-                        "common_elements": list(common_elements)  # 将 set 转换为 list
-                    }
-                    results.append(result)
-                    count += 1
-        except Exception as e:
-            pass
-
-    return jsonify(results)
-
+            while sent < count and time.monotonic() < deadline:
+                size = min(STREAM_CHUNK, count - sent)
+                batch = generate_batch(size, interval_data, parity_data, data['blue'], index=index,
+                                       consecutive=False, sum_table=sum_table, rng=ticket_rng.generator,
+                                       span_table=span_table)
+                sampling_attempts.inc(size, mode='stream')
+                for record in batch_to_records(batch, period):
+                    yield encode(record)
+                    sent += 1
+                # gevent打过补丁后sleep(0)切换到其他连接的协程，线程模式下只是让出GIL
+                time.sleep(0)
+            yield encode({"done": True, "count": sent, "reason": "count" if sent == count else "budget"}, 'done')
+        finally:
+            tickets_generated.inc(sent, mode='stream')
+            release_slot()
+
+    response = Response(tickets(), mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                                 'X-Seed': str(ticket_rng.seed)})
+    # 生成器还没开始就被关闭（如客户端立即断开）时不会执行finally，由响应关闭时释放
+    response.call_on_close(release_slot)
+    return response
+
+
+def build_stats_response():
+    # 统计结果只在新开奖同步后变化：有本地开奖库时以最新期号作为版本，否则以内容摘要作为版本
+    if len(stats_engine):
+        issue = stats_engine.latest_issue
+        tables = stats_engine.tables()
+        body = {'issue': issue, 'window': STATS_WINDOW, 'draws': len(stats_engine)}
+        body.update({dimension: tables[dimension] for dimension in DIMENSIONS})
+        latest_draw = draw_store.latest_draw()
+        last_modified = datetime.datetime.fromisoformat(latest_draw['date']).replace(tzinfo=datetime.timezone.utc)
+        etag = f'{issue}-{STATS_WINDOW}'
+    else:
+        interval_data, parity_data = get_interval_parity_data()
+        body = {'issue': None, 'window': None, 'interval': interval_data, 'parity': parity_data,
+                'blue': get_blue_data()}
+        last_modified = None
+    payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if not len(stats_engine):
+        etag = hashlib.md5(payload).hexdigest()
+    return payload, etag, last_modified
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    # 响应体按期号缓存在进程内，同步到新开奖时随data_cache一起失效；带ETag/Last-Modified供CDN和反向代理缓存
+    payload, etag, last_modified = data_cache.get(f'stats:{stats_engine.latest_issue}', build_stats_response)
+    response = Response(payload, mimetype='application/json')
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = STATS_MAX_AGE
+    return response.make_conditional(request)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(data_cache.stats())
+
+
+# 后台同步开奖数据，启动和请求都不等待网络
+if not OFFLINE:
+    threading.Thread(target=sync_forever, daemon=True).start()
+# 全量红球索引枚举一次要几秒，启动时在后台构建，之后每期的索引只需筛选
+threading.Thread(target=get_index, daemon=True).start()
 
 if __name__ == '__main__':
     app.run(debug=True)
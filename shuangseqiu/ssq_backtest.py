@@ -0,0 +1,144 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ssq_batch import sample_blue_balls, sample_red_codes
+from ssq_sampler import get_index, overlap_index, popcount, to_mask
+from ssq_stats import StatsEngine
+from ssq_store import DEFAULT_DB_PATH, DrawStore
+
+# 策略变体：是否要求与上期恰好一个重号、是否允许连号、是否按历史权重
+VARIANTS = {
+    'full': {'repeat_filter': True, 'consecutive': False, 'weighted': True},
+    'no_repeat_filter': {'repeat_filter': False, 'consecutive': False, 'weighted': True},
+    'allow_consecutive': {'repeat_filter': True, 'consecutive': None, 'weighted': True},
+    'uniform': {'repeat_filter': False, 'consecutive': None, 'weighted': False},
+}
+
+TIER_NAMES = ['未中奖', '一等奖', '二等奖', '三等奖', '四等奖', '五等奖', '六等奖']
+# PRIZE_TIERS[红球命中数, 蓝球是否命中] -> 奖级，0为未中奖
+PRIZE_TIERS = np.array([
+    [0, 6], [0, 6], [0, 6], [0, 5], [5, 4], [4, 3], [2, 1],
+], dtype=np.int8)
+
+BATCH_SIZE = 250000
+
+
+def score_tickets(codes, blue_balls, draw):
+    """向量化计算每注的奖级，返回各奖级的注数"""
+    red_hits = popcount(codes & np.uint64(to_mask(draw['red'])))
+    blue_hits = (blue_balls == draw['blue']).any(axis=1)
+    return np.bincount(PRIZE_TIERS[red_hits, blue_hits.astype(np.int8)], minlength=len(TIER_NAMES))
+
+
+def draw_rng(entropy, variant, position):
+    """某个策略变体回测第position期用的随机数源，只取决于种子、变体和期的位置，与进程数和分段无关"""
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(list(VARIANTS).index(variant), position)))
+
+
+def _run_chunk(draws, start, end, tickets, window, variants, entropy):
+    """回测draws[start:end]中的每一期，只使用该期之前的开奖数据；每个策略变体每一期一个独立的随机数流"""
+    base_index = get_index()
+    engine = StatsEngine(window)
+    engine.load(draws[max(0, start - window):start][::-1])
+    counts = {name: np.zeros(len(TIER_NAMES), dtype=np.int64) for name in variants}
+
+    for position in range(start, end):
+        draw = draws[position]
+        tables = engine.tables()
+        last_index = overlap_index(base_index, draws[position - 1]['red'])
+        for name in variants:
+            rng = draw_rng(entropy, name, position)
+            variant = VARIANTS[name]
+            index = last_index if variant['repeat_filter'] else base_index
+            remaining = tickets
+            while remaining:
+                size = min(remaining, BATCH_SIZE)
+                if variant['weighted']:
+                    codes, _, _ = sample_red_codes(size, tables['interval'], tables['parity'], index,
+                                                   variant['consecutive'], tables['sum'], rng, tables['span'])
+                    blue_balls = sample_blue_balls(size, tables['blue'], rng)
+                else:
+                    codes = np.frombuffer(index.codes, dtype=np.uint64)[rng.integers(len(index), size=size)]
+                    blue_balls = rng.integers(1, 17, size=(size, 1))
+                counts[name] += score_tickets(codes, blue_balls, draw)
+                remaining -= size
+        engine.add_draws([draw])
+    return counts
+
+
+def backtest(draws, tickets, window=120, variants=tuple(VARIANTS), workers=None, seed=None):
+    """draws为按开奖顺序排列（最早的在前）的历史开奖，逐期回测各策略变体"""
+    workers = workers or os.cpu_count()
+    targets = range(max(window, 1), len(draws))
+    if not targets:
+        raise ValueError(f"开奖数据不足，至少需要 {window + 1} 期")
+    seed_sequence = np.random.SeedSequence(seed)
+    bounds = np.linspace(targets.start, targets.stop, min(workers, len(targets)) + 1).astype(int)
+    # 每期的随机数源由(变体, 期)派生，同一种子在任意进程数下结果一致，也与同时回测哪些变体无关
+    with ProcessPoolExecutor(max_workers=len(bounds) - 1) as executor:
+        futures = [executor.submit(_run_chunk, draws, int(start), int(end), tickets, window, tuple(variants),
+                                   seed_sequence.entropy)
+                   for start, end in zip(bounds[:-1], bounds[1:])]
+        totals = {name: np.zeros(len(TIER_NAMES), dtype=np.int64) for name in variants}
+        for future in futures:
+            for name, counts in future.result().items():
+                totals[name] += counts
+
+    draw_count = len(targets)
+    report = {'draws': draw_count, 'tickets_per_draw': tickets, 'seed': seed_sequence.entropy, 'variants': {}}
+    for name, counts in totals.items():
+        total_tickets = draw_count * tickets
+        report['variants'][name] = {
+            'tiers': {tier: int(count) for tier, count in zip(TIER_NAMES, counts)},
+            'hit_rates': {tier: count / total_tickets for tier, count in zip(TIER_NAMES[1:], counts[1:])},
+            'any_prize_rate': int(counts[1:].sum()) / total_tickets,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球选号策略历史回测")
+    parser.add_argument('--db', default=os.environ.get('SSQ_DB_PATH', DEFAULT_DB_PATH), help="开奖历史库路径")
+    parser.add_argument('--years', type=float, default=10, help="回测最近多少年的开奖")
+    parser.add_argument('--tickets', type=int, default=10000, help="每期生成的注数")
+    parser.add_argument('--window', type=int, default=120, help="统计窗口期数")
+    parser.add_argument('--variants', default=','.join(VARIANTS), help="逗号分隔的策略变体")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认CPU核数")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子，相同种子结果一致，与进程数无关")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    variants = args.variants.split(',')
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        parser.error(f"未知的策略变体: {', '.join(unknown)}")
+
+    draws = DrawStore(args.db).recent_draws()[::-1]
+    if draws:
+        # 统计窗口需要回测区间之前的数据
+        since = (datetime.date.fromisoformat(draws[-1]['date']) - datetime.timedelta(days=365 * args.years)).isoformat()
+        first = next(i for i, draw in enumerate(draws) if draw['date'] >= since)
+        draws = draws[max(0, first - args.window):]
+
+    start = time.perf_counter()
+    report = backtest(draws, args.tickets, args.window, variants, args.workers, args.seed)
+    report['seconds'] = time.perf_counter() - start
+
+    print(f"回测 {report['draws']} 期，每期 {args.tickets} 注，用时 {report['seconds']:.1f} 秒，种子 {report['seed']}")
+    for name, result in report['variants'].items():
+        tiers = ' '.join(f"{tier}:{count}" for tier, count in list(result['tiers'].items())[1:])
+        print(f"{name:18s} 中奖率 {result['any_prize_rate']:.4%}  {tiers}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ssq_rng import TicketRng
+from ssq_sampler import SUM_BUCKETS, SUM_WEIGHTS, get_index
+
+_RED_SHIFTS = np.arange(1, 34, dtype=np.uint64)
+# 并行生成时每个分片的注数；分片大小固定，结果才与线程数无关
+SHARD_SIZE = 65536
+
+
+def _weighted_choice(rng, cum_weights, size):
+    # 按累计权重批量抽样，返回下标数组
+    cum_weights = np.asarray(cum_weights, dtype=np.float64)
+    return np.searchsorted(cum_weights, rng.random(size) * cum_weights[-1], side='right')
+
+
+def decode_masks(codes):
+    """把号码位图数组解码成(n, 6)的红球数组，每行升序"""
+    bits = (codes[:, None] >> _RED_SHIFTS) & np.uint64(1)
+    return (np.nonzero(bits)[1].reshape(len(codes), 6) + 1).astype(np.int8)
+
+
+def sample_red_codes(count, interval_data, parity_data, index, consecutive=None, sum_table=None, rng=None,
+                     span_table=None):
+    """批量抽取红球，返回(号码位图数组, 每注所属分组下标, 分组列表)"""
+    if sum_table is None:
+        sum_table = [SUM_BUCKETS, SUM_WEIGHTS]
+    if rng is None:
+        rng = np.random.default_rng()
+
+    groups, cum_weights = index.joint_table(interval_data, parity_data, sum_table, consecutive, span_table)
+    if not groups:
+        raise ValueError("没有满足条件的红球组合")
+
+    # 把每个分组拆成若干连续切片，切片权重 = 分组权重 * 切片占分组的比例
+    slice_low = []
+    slice_size = []
+    slice_group = []
+    slice_weight = []
+    previous = 0
+    for group_id, ((zones, parity, sum_range, span_range), cum_weight) in enumerate(zip(groups, cum_weights)):
+        group_weight = cum_weight - previous
+        previous = cum_weight
+        slices = index.slices(zones, parity[0], sum_range, consecutive, span_range)
+        total = sum(high - low for low, high in slices)
+        for low, high in slices:
+            slice_low.append(low)
+            slice_size.append(high - low)
+            slice_group.append(group_id)
+            slice_weight.append(group_weight * (high - low) / total)
+
+    picked = _weighted_choice(rng, np.cumsum(slice_weight), count)
+    slice_low = np.asarray(slice_low, dtype=np.int64)[picked]
+    slice_size = np.asarray(slice_size, dtype=np.int64)[picked]
+    offsets = slice_low + (rng.random(count) * slice_size).astype(np.int64)
+    codes = np.frombuffer(index.codes, dtype=np.uint64)[offsets]
+    return codes, np.asarray(slice_group, dtype=np.int64)[picked], groups
+
+
+def sample_blue_balls(count, blue_data, rng=None):
+    """按蓝球权重批量抽取，返回(n, k)数组，每行升序"""
+    if rng is None:
+        rng = np.random.default_rng()
+    blue_proportion, interval_weights = blue_data
+    picked = _weighted_choice(rng, np.cumsum(interval_weights), count)
+    return np.sort(np.array(blue_proportion, dtype=np.int8)[picked], axis=1)
+
+
+def generate_batch(count, interval_data, parity_data, blue_data, index=None, consecutive=None, sum_table=None,
+                   rng=None, span_table=None):
+    """批量生成count注号码，规则与generate_numbers/back_random_nums一致，结果为NumPy数组"""
+    if index is None:
+        index = get_index()
+    if rng is None:
+        rng = np.random.default_rng()
+
+    codes, group_ids, groups = sample_red_codes(count, interval_data, parity_data, index, consecutive, sum_table, rng,
+                                                span_table)
+    red_balls = decode_masks(codes)
+    ratios = np.array([group[0] for group in groups], dtype=np.int8)[group_ids]
+    odd_even_ratios = np.array([group[1] for group in groups], dtype=np.int8)[group_ids]
+    blue_balls = sample_blue_balls(count, blue_data, rng)
+
+    return {
+        "red_balls": red_balls,
+        "blue_ball": blue_balls,
+        "span": red_balls[:, 5] - red_balls[:, 0],
+        "total_sum": red_balls.sum(axis=1, dtype=np.int16),
+        "ratios": ratios,
+        "odd_even_ratio": odd_even_ratios,
+    }
+
+
+def generate_parallel(count, interval_data, parity_data, blue_data, index=None, consecutive=None, sum_table=None,
+                      ticket_rng=None, workers=None, span_table=None):
+    """按SHARD_SIZE分片并行生成，每个分片用ticket_rng派生的独立随机数流，按分片顺序拼接；
+    同一种子在任意线程数下结果一致。NumPy在抽样和解码时释放GIL，线程即可用满多核"""
+    if index is None:
+        index = get_index()
+    if ticket_rng is None:
+        ticket_rng = TicketRng()
+    # 先算好联合权重表，各线程只读缓存
+    index.joint_table(interval_data, parity_data, sum_table or [SUM_BUCKETS, SUM_WEIGHTS], consecutive, span_table)
+    sizes = [min(SHARD_SIZE, count - start) for start in range(0, count, SHARD_SIZE)]
+    shard_rngs = ticket_rng.spawn(len(sizes))
+
+    def run(size, shard_rng):
+        return generate_batch(size, interval_data, parity_data, blue_data, index, consecutive, sum_table,
+                              shard_rng.generator, span_table)
+
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    if workers <= 1:
+        shards = list(map(run, sizes, shard_rngs))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            shards = list(executor.map(run, sizes, shard_rngs))
+    return {key: np.concatenate([shard[key] for shard in shards]) for key in shards[0]}
+
+
+def batch_to_records(batch, period=None):
+    """把批量结果转成和/generate相同结构的字典列表"""
+    red_balls = batch["red_balls"].tolist()
+    if period is None:
+        common = [[] for _ in red_balls]
+    else:
+        in_period = np.isin(batch["red_balls"], period)
+        common = [[n for n, hit in zip(row, hits) if hit] for row, hits in zip(red_balls, in_period.tolist())]
+    return [
+        {
+            "red_balls": red,
+            "blue_ball": blue,
+            "span": span,
+            "total_sum": total_sum,
+            "ratios": ratios,
+            "odd_even_ratio": odd_even_ratio,
+            "common_elements": common_elements,
+        }
+        for red, blue, span, total_sum, ratios, odd_even_ratio, common_elements in zip(
+            red_balls, batch["blue_ball"].tolist(), batch["span"].tolist(), batch["total_sum"].tolist(),
+            batch["ratios"].tolist(), batch["odd_even_ratio"].tolist(), common)
+    ]
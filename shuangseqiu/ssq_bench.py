@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 页面结构与走势页一致：/html/body/div[2]/div/div/div[2]/div[2]/table/tbody[1]/tr/td[n]
+PAGE_TEMPLATE = ('<html><head><meta charset="utf-8"></head><body><div>header</div><div><div><div>'
+                 '<div>menu</div><div><div>tabs</div><div><table><tbody>{rows}</tbody>'
+                 '<tbody><tr><td>出现次数</td></tr></tbody></table></div></div></div></div></div></body></html>')
+SECTIONS = [(1, 11), (12, 22), (23, 33)]
+
+
+def _trend_page(rows, width, values):
+    # 每行width个单元格，values为{td序号: 取值函数}
+    html_rows = []
+    for draw in rows:
+        cells = [str(i) for i in range(1, width + 1)]
+        for column, value in values.items():
+            cells[column - 1] = value(draw)
+        html_rows.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+    return PAGE_TEMPLATE.format(rows=''.join(html_rows))
+
+
+def make_fixtures(directory, draw_count=300, seed=0):
+    """生成离线基准用的上游数据：ssq.html、lqzs.html、draws.json"""
+    rng = random.Random(seed)
+    draws = []
+    for i in range(draw_count):
+        red = sorted(rng.sample(range(1, 34), 6))
+        draws.append({'code': str(2024000 + draw_count - i), 'date': '2024-01-01(一)',
+                      'red': ','.join(f'{ball:02d}' for ball in red), 'blue': f'{rng.randint(1, 16):02d}'})
+
+    def reds(draw):
+        return [int(ball) for ball in draw['red'].split(',')]
+
+    def interval(draw):
+        return ':'.join(str(sum(1 for ball in reds(draw) if low <= ball <= high)) for low, high in SECTIONS)
+
+    def parity(draw):
+        odds = sum(ball % 2 for ball in reds(draw))
+        return f'{odds}:{6 - odds}'
+
+    os.makedirs(directory, exist_ok=True)
+    pages = {
+        'ssq.html': _trend_page(draws[:120], 70, {60: interval, 61: parity}),
+        'lqzs.html': _trend_page(draws[:120], 30, {11: lambda draw: draw['blue']}),
+    }
+    for name, page in pages.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(page)
+    with open(os.path.join(directory, 'draws.json'), 'w', encoding='utf-8') as f:
+        json.dump({'result': draws}, f, ensure_ascii=False)
+
+
+def record_fixtures(directory):
+    """从真实上游录制基准数据"""
+    import ssq_http
+    from ssq_store import DRAWS_PATH
+    os.makedirs(directory, exist_ok=True)
+    urls = {
+        'ssq.html': f"{ssq_http.CZ89_BASE}/zst/ssq?pagesize=120",
+        'lqzs.html': f"{ssq_http.CZ89_BASE}/zst/ssq/lqzs.htm?pagesize=120",
+        'draws.json': ssq_http.CWL_BASE + DRAWS_PATH.format(page_no=1, page_size=100),
+    }
+    for name, url in urls.items():
+        response = ssq_http.get(url)
+        response.raise_for_status()
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(response.content)
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return {f'p{p}': samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000 for p in (50, 95, 99)}
+
+
+def run(fixture_dir, quick=False):
+    """在本地数据上运行所有基准，返回{指标名: {'value', 'unit', 'higher_is_better'}}"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    # 必须在导入shuangseqiu之前设置
+    os.environ.update({'SSQ_FIXTURE_DIR': fixture_dir, 'SSQ_DB_PATH': db_path, 'SSQ_OFFLINE': '1'})
+    import numpy as np
+    import shuangseqiu
+    from ssq_batch import generate_batch
+    from ssq_parser import benchmark as parser_benchmark
+
+    results = {}
+
+    def record(name, value, unit, higher_is_better):
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+    # 抓取页面解析
+    for name, columns in (('ssq.html', (60, 61)), ('lqzs.html', (11,))):
+        with open(os.path.join(fixture_dir, name), 'rb') as f:
+            page = f.read()
+        timings, _ = parser_benchmark(page, columns, repeat=5 if quick else 20)
+        for parser_name, seconds in timings.items():
+            record(f'parse.{name}.{parser_name}', seconds * 1000, 'ms/page', False)
+
+    # 用录制的开奖数据初始化本地库，与线上一致走统计引擎
+    shuangseqiu.draw_store.import_json(os.path.join(fixture_dir, 'draws.json'))
+    shuangseqiu.stats_engine.load(shuangseqiu.draw_store.recent_draws(shuangseqiu.STATS_WINDOW))
+    (items, percentages), (second_items, second_percentages) = shuangseqiu.get_interval_parity_data()
+    blue_data = shuangseqiu.get_blue_data()
+    sum_table = shuangseqiu.get_sum_table()
+    span_table = shuangseqiu.get_span_table()
+    period = shuangseqiu.get_red_balls()
+
+    # 全量索引进程内只枚举一次；新开奖后每一期的索引从全量索引筛出
+    start = time.perf_counter()
+    shuangseqiu.get_index()
+    record('index.build_full', time.perf_counter() - start, 's', False)
+    start = time.perf_counter()
+    index = shuangseqiu.get_index(period)
+    record('index.build', time.perf_counter() - start, 's', False)
+
+    # 单注生成：吞吐、单次耗时分布、约束违反次数
+    tickets = 2000 if quick else 20000
+    latencies = []
+    violations = 0
+    for _ in range(tickets):
+        call_start = time.perf_counter()
+        numbers, total_sum, ratios, odd_even_ratio = shuangseqiu.generate_numbers(
+            items, percentages, second_items, second_percentages, index=index, consecutive=False, sum_table=sum_table,
+            span_table=span_table)
+        latencies.append(time.perf_counter() - call_start)
+        if (len(set(period) & set(numbers)) != 1 or shuangseqiu.has_consecutive_numbers(list(numbers))
+                or sum(ball % 2 for ball in numbers) != odd_even_ratio[0]):
+            violations += 1
+    record('generate_numbers.tickets_per_sec', tickets / sum(latencies), 'tickets/s', True)
+    for name, value in _percentiles(latencies).items():
+        record(f'generate_numbers.latency.{name}', value, 'ms', False)
+    record('generate_numbers.violations', violations, 'tickets', False)
+
+    # 批量生成
+    count = 100000 if quick else 1000000
+    start = time.perf_counter()
+    generate_batch(count, [items, percentages], [second_items, second_percentages], blue_data,
+                   index=index, consecutive=False, sum_table=sum_table, rng=np.random.default_rng(0),
+                   span_table=span_table)
+    record('generate_batch.tickets_per_sec', count / (time.perf_counter() - start), 'tickets/s', True)
+
+    # 端到端：Flask测试客户端
+    client = shuangseqiu.app.test_client()
+    for path, requests_count in (('/generate', 50 if quick else 500), ('/generate?count=1000', 5 if quick else 50)):
+        latencies = []
+        for _ in range(requests_count):
+            request_start = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - request_start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} 返回 {response.status_code}")
+        for name, value in _percentiles(latencies).items():
+            record(f'http.{path}.latency.{name}', value, 'ms', False)
+    return results
+
+
+def compare(old, new, threshold=0.1):
+    """对比两次结果，变差超过threshold比例的指标视为回归"""
+    regressions = []
+    for name, current in new.items():
+        previous = old.get(name)
+        if previous is None:
+            continue
+        if not previous['value']:
+            # 原来为0的指标（如约束违反次数）只要变差就算回归
+            if not current['higher_is_better'] and current['value'] > 0:
+                regressions.append((name, previous['value'], current['value'], float('inf')))
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        if current['higher_is_better']:
+            change = -change
+        if change > threshold:
+            regressions.append((name, previous['value'], current['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球服务性能基准")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="运行基准并输出JSON")
+    run_parser.add_argument('--fixtures', help="录制的上游数据目录，默认生成模拟数据")
+    run_parser.add_argument('--output', default='bench_results.json')
+    run_parser.add_argument('--quick', action='store_true', help="减少迭代次数")
+    record_parser = subparsers.add_parser('record', help="从真实上游录制数据")
+    record_parser.add_argument('directory')
+    compare_parser = subparsers.add_parser('compare', help="对比两次结果，发现回归时返回非0")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record_fixtures(args.directory)
+        return 0
+
+    if args.command == 'compare':
+        with open(args.old, encoding='utf-8') as f:
+            old = json.load(f)['results']
+        with open(args.new, encoding='utf-8') as f:
+            new = json.load(f)['results']
+        regressions = compare(old, new, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"回归 {name}: {previous:.4g} -> {current:.4g} (变差 {change:.1%})")
+        if not regressions:
+            print("没有发现回归")
+        return 1 if regressions else 0
+
+    fixture_dir = args.fixtures
+    if fixture_dir is None:
+        fixture_dir = tempfile.mkdtemp()
+        make_fixtures(fixture_dir)
+    results = run(fixture_dir, args.quick)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': sys.version.split()[0],
+                   'results': results}, f, ensure_ascii=False, indent=2)
+    for name, result in results.items():
+        print(f"{name:48s} {result['value']:12.3f} {result['unit']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """带TTL的进程内缓存：过期后先返回旧值并在后台刷新，并发未命中只触发一次加载"""
+
+    def __init__(self, ttl=600, stale_ttl=None):
+        self.ttl = ttl
+        # 过期后仍可返回旧值的时长，默认再给一个TTL
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (value, loaded_at)
+        self._inflight = {}  # key -> Future
+        # 每次invalidate加一；invalidate之前开始的加载结果已经过时，不再写回
+        self._generation = 0
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0, 'errors': 0,
+                          'discarded': 0}
+
+    def get(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                age = now - loaded_at
+                if age < self.ttl:
+                    self._counters['hits'] += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    # stale-while-revalidate：先返回旧值，后台刷新
+                    self._counters['stale_hits'] += 1
+                    if key not in self._inflight:
+                        future = self._inflight[key] = Future()
+                        threading.Thread(target=self._load, args=(key, loader, future, self._generation),
+                                         daemon=True).start()
+                    return value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self._counters['misses'] += 1
+                future = self._inflight[key] = Future()
+                generation = self._generation
+            else:
+                self._counters['coalesced'] += 1
+
+        if owner:
+            self._load(key, loader, future, generation)
+        # 同一个key的并发未命中等待同一次加载结果
+        return future.result()
+
+    def _load(self, key, loader, future, generation):
+        with self._lock:
+            refreshing = key in self._entries
+        try:
+            value = loader()
+        except Exception as e:
+            logging.error(f"加载缓存数据失败: {key}, 错误: {e}")
+            with self._lock:
+                self._counters['errors'] += 1
+                self._finish(key, future)
+            future.set_exception(e)
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic())
+                if refreshing:
+                    self._counters['refreshes'] += 1
+            else:
+                # 加载期间缓存被清除，结果只交给已经在等待的调用方
+                self._counters['discarded'] += 1
+            self._finish(key, future)
+        future.set_result(value)
+
+    def _finish(self, key, future):
+        # invalidate之后可能已经有新的加载占了这个key，只移除自己的
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self._inflight.clear()
+            else:
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['keys'] = len(self._entries)
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        return stats
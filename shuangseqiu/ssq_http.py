@@ -0,0 +1,77 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ssq_metrics import upstream_requests, upstream_retries, upstream_seconds
+
+# 上游地址可以指向本地替身服务，便于测试
+CZ89_BASE = os.environ.get('SSQ_CZ89_BASE', 'https://m.cz89.com')
+CWL_BASE = os.environ.get('SSQ_CWL_BASE', 'https://www.cwl.gov.cn')
+
+# (连接超时, 读取超时)，单位秒
+TIMEOUT = (float(os.environ.get('SSQ_CONNECT_TIMEOUT', 3.05)), float(os.environ.get('SSQ_READ_TIMEOUT', 10)))
+RETRIES = int(os.environ.get('SSQ_RETRIES', 3))
+# 每个上游主机的最大连接数
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get('SSQ_MAX_CONNECTIONS', 4))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+
+class CountingRetry(Retry):
+    """每次决定重试时计入upstream_retries；session.get只返回最后一次结果，重试在urllib3内部发生"""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        # 重试次数用完时父类抛出MaxRetryError，不计为重试
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        host = ''
+        if _pool is not None:
+            host = _pool.host if _pool.port in (None, 80, 443) else f'{_pool.host}:{_pool.port}'
+        reason = response.status if response is not None and error is None else type(error).__name__
+        upstream_retries.inc(host=host, reason=reason)
+        return retry
+
+
+def make_session():
+    """带连接池（keep-alive）、按主机限制连接数、失败指数退避重试的Session"""
+    retry = CountingRetry(total=RETRIES, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET']), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=MAX_CONNECTIONS_PER_HOST, pool_block=True,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+session = make_session()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='ssq-fetch')
+
+
+def get(url, **kwargs):
+    kwargs.setdefault('timeout', TIMEOUT)
+    host = urlsplit(url).netloc
+    start = time.perf_counter()
+    try:
+        response = session.get(url, **kwargs)
+    except requests.RequestException:
+        upstream_requests.inc(host=host, status='error')
+        raise
+    finally:
+        upstream_seconds.observe(time.perf_counter() - start, host=host)
+    upstream_requests.inc(host=host, status=response.status_code)
+    return response
+
+
+def fetch_concurrently(tasks, timeout=None):
+    """并发执行{名称: 无参函数}，返回{名称: 结果}；任一任务出错时抛出该异常，
+    timeout秒内没有全部完成时抛出concurrent.futures.TimeoutError（任务仍在后台跑完并写入缓存）"""
+    futures = {name: _executor.submit(task) for name, task in tasks.items()}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    return {name: future.result(None if deadline is None else max(0, deadline - time.monotonic()))
+            for name, future in futures.items()}
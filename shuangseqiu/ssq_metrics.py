@@ -0,0 +1,128 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 默认的耗时分桶（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        # 标签值统一转成字符串，避免同一位置混用int和str时排序出错
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f'{self.name}{_format_labels(self.labelnames, key)} {value}' for key, value in items)
+        return lines
+
+
+class Histogram:
+    """按分桶累计的耗时分布"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # 标签 -> [各分桶计数..., 总和, 总数]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        # 标签值统一转成字符串，避免同一位置混用int和str时排序出错
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            if position < len(self.buckets):
+                counts[position] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {counts[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {counts[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {counts[-1]}')
+        return lines
+
+
+class CallbackCounter:
+    """导出时才从回调读取的一组计数，回调返回{标签值: 数值}"""
+
+    def __init__(self, name, documentation, labelname, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelname = labelname
+        self.callback = callback
+        _registry.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label, value in sorted(self.callback().items()):
+            lines.append(f'{self.name}{_format_labels((self.labelname,), (label,))} {value}')
+        return lines
+
+
+def render():
+    """Prometheus文本格式"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# 各阶段的指标
+upstream_seconds = Histogram('ssq_upstream_request_seconds', '上游请求耗时（到收到响应头）', ('host',))
+upstream_requests = Counter('ssq_upstream_requests_total', '上游请求次数（不含重试）', ('host', 'status'))
+upstream_retries = Counter('ssq_upstream_retries_total', '上游请求失败后的重试次数，reason为状态码或异常类型',
+                           ('host', 'reason'))
+parse_seconds = Histogram('ssq_parse_seconds', '走势页下载并解析的耗时', ('page',))
+sampling_attempts = Counter('ssq_sampling_attempts_total', '红球抽样次数', ('mode',))
+sampling_failures = Counter('ssq_sampling_failures_total', '没有满足条件的组合而放弃抽样的次数', ('mode',))
+tickets_generated = Counter('ssq_tickets_generated_total', '生成的号码注数', ('mode',))
+request_seconds = Histogram('ssq_http_request_seconds',
+                            '请求处理耗时；/generate/stream只计到返回响应头，不含之后的流式输出', ('endpoint', 'status'))
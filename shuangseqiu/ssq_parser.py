@@ -0,0 +1,154 @@
+import re
+import sys
+import time
+
+from lxml import etree, html
+
+# 走势表所在位置，与原来的绝对XPath一致
+TABLE_PATH = '/html/body/div[2]/div/div/div[2]/div[2]/table'
+MAX_ROWS = 120
+VALUE_PATTERN = re.compile(r'^\d+(:\d+)*$')
+
+
+class LayoutError(ValueError):
+    """走势页结构变化，找不到走势表或单元格内容不符合预期"""
+
+
+class TrendTableParser:
+    """边接收HTML边解析：只遍历一次走势表第一个tbody的行，读取指定列（td序号从1开始）"""
+
+    def __init__(self, columns, max_rows=MAX_ROWS):
+        self.columns = tuple(columns)
+        self.max_rows = max_rows
+        self.rows = []
+        self._parser = etree.HTMLPullParser(events=('end',), tag='tr')
+        self._tables = {}  # 表格元素 -> 是否为走势表
+
+    @property
+    def done(self):
+        return len(self.rows) >= self.max_rows
+
+    def _is_trend_table(self, table):
+        result = self._tables.get(table)
+        if result is None:
+            result = self._tables[table] = table.getroottree().getpath(table) == TABLE_PATH
+        return result
+
+    def _add_row(self, tr):
+        cells = tr.findall('td')
+        if len(cells) < max(self.columns):
+            return
+        row = tuple(''.join(cells[column - 1].itertext()).strip() for column in self.columns)
+        for column, value in zip(self.columns, row):
+            if not VALUE_PATTERN.match(value):
+                raise LayoutError(f"走势表第{len(self.rows) + 1}行td[{column}]内容不符合预期: {value!r}")
+        self.rows.append(row)
+
+    def _read_events(self):
+        for _, tr in self._parser.read_events():
+            if self.done:
+                continue
+            tbody = tr.getparent()
+            if tbody is None or tbody.tag != 'tbody':
+                continue
+            table = tbody.getparent()
+            if table is None or table.tag != 'table' or table.find('tbody') is not tbody:
+                continue
+            if self._is_trend_table(table):
+                self._add_row(tr)
+            # 已读过的行不再需要，释放内存
+            tr.clear()
+
+    def read_table(self, table):
+        # 已经解析好的走势表，直接遍历第一个tbody的行
+        tbody = table.find('tbody')
+        if tbody is not None:
+            for tr in tbody.iterchildren('tr'):
+                if self.done:
+                    break
+                self._add_row(tr)
+        return self.result()
+
+    def feed(self, data):
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self):
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            # 提前结束读取时文档不完整，忽略
+            pass
+        self._read_events()
+        return self.result()
+
+    def result(self):
+        if not self.rows:
+            raise LayoutError(f"页面中没有找到走势表数据: {TABLE_PATH}/tbody[1]/tr/td{list(self.columns)}")
+        return self.rows
+
+
+def parse_trend_table(page, columns, max_rows=MAX_ROWS):
+    """解析完整页面，返回每行指定列的文本元组"""
+    parser = TrendTableParser(columns, max_rows)
+    root = etree.HTML(page)
+    # 只定位一次走势表，之后按行顺序读取
+    tables = root.xpath(TABLE_PATH) if root is not None else []
+    if not tables:
+        raise LayoutError(f"页面中没有找到走势表: {TABLE_PATH}")
+    return parser.read_table(tables[0])
+
+
+def parse_trend_stream(chunks, columns, max_rows=MAX_ROWS):
+    """逐块解析页面字节流，读满max_rows行后立即停止读取"""
+    parser = TrendTableParser(columns, max_rows)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.close()
+
+
+def xpath_columns(page, columns, max_rows=MAX_ROWS):
+    # 原来的逐行绝对XPath实现，仅用于基准对比
+    tree = html.fromstring(page)
+    rows = []
+    for i in range(1, max_rows + 1):
+        values = [tree.xpath(f"{TABLE_PATH}/tbody[1]/tr[{i}]/td[{column}]") for column in columns]
+        if all(values):
+            rows.append(tuple(value[0].text_content().strip() for value in values))
+    return rows
+
+
+def _parse_in_chunks(page, columns, chunk_size=16384):
+    # 模拟边下载边解析
+    return parse_trend_stream((page[i:i + chunk_size] for i in range(0, len(page), chunk_size)), columns)
+
+
+def benchmark(page, columns, repeat=20):
+    """对比原XPath实现、单次遍历、流式解析三种方式每页的耗时"""
+    parsers = (('xpath', xpath_columns), ('single_pass', parse_trend_table), ('stream', _parse_in_chunks))
+    results = {}
+    outputs = []
+    for name, func in parsers:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = func(page, columns)
+        results[name] = (time.perf_counter() - start) / repeat
+        outputs.append(rows)
+    if any(rows != outputs[0] for rows in outputs):
+        raise AssertionError("几种解析方式结果不一致")
+    return results, len(outputs[0])
+
+
+if __name__ == '__main__':
+    # 用法: python ssq_parser.py 页面.html 60 61
+    if len(sys.argv) < 3:
+        print("用法: python ssq_parser.py <page.html> <td序号>...")
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as f:
+        page = f.read()
+    timings, row_count = benchmark(page, [int(column) for column in sys.argv[2:]])
+    for name, seconds in timings.items():
+        print(f"{name:12s} {seconds * 1000:8.3f} ms/页 ({row_count} 行)")
+    print(f"加速 {timings['xpath'] / timings['single_pass']:.1f}x")
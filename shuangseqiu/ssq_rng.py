@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+
+
+class TicketRng:
+    """一次生成使用的随机数源，由一个种子决定全部结果
+
+    Python逐注路径用random.Random，批量路径用NumPy Generator，两者从同一个SeedSequence派生；
+    spawn()给并行的分片或进程派生互不相关的子随机数源，不共享任何状态。
+    """
+
+    def __init__(self, seed=None):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            # seed为None时取系统熵，生成后仍可用self.seed复现
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        python_sequence, numpy_sequence = (np.random.SeedSequence(self.seed_sequence.entropy,
+                                                                  spawn_key=self.seed_sequence.spawn_key + (i,))
+                                           for i in range(2))
+        self.random = random.Random(int.from_bytes(python_sequence.generate_state(4).tobytes(), 'little'))
+        self.generator = np.random.default_rng(numpy_sequence)
+        self._children = 0
+
+    def spawn(self, n):
+        """派生n个独立的子随机数源；子源的种子只取决于父种子和派生顺序"""
+        children = [TicketRng(np.random.SeedSequence(self.seed_sequence.entropy,
+                                                     spawn_key=self.seed_sequence.spawn_key + (2, self._children + i)))
+                    for i in range(n)]
+        self._children += n
+        return children
+
+
+def parse_seed(value):
+    """请求参数中的种子：非负整数，空值表示随机"""
+    if value is None or value == '':
+        return None
+    seed = int(value)
+    if seed < 0:
+        raise ValueError("种子必须是非负整数")
+    return seed
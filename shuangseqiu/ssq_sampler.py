@@ -0,0 +1,208 @@
+import random
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+
+import numpy as np
+
+SECTIONS = [(1, 11), (12, 22), (23, 33)]
+RED_NUMBERS = range(1, 34)
+MAX_SUM = sum(range(28, 34))  # 红球和值上限183
+
+# 和值区间及其权重
+SUM_BUCKETS = [(40, 49), (50, 59),
+               (60, 69), (70, 79), (80, 89),
+               (90, 99), (100, 109), (110, 119),
+               (120, 129), (130, 139), (140, 149)]
+SUM_WEIGHTS = [0.01, 0.01, 0.06, 0.10, 0.11, 0.20, 0.14, 0.21, 0.11, 0.02, 0.03]
+
+# 每个号码的特征位：0-11位为三个区间的个数，12-15位奇数个数，16-23位和值，24位起为号码位图
+_FEATURES = [0] * 34
+for _zone, (_low, _high) in enumerate(SECTIONS):
+    for _n in range(_low, _high + 1):
+        _FEATURES[_n] = (1 << (4 * _zone)) | ((_n & 1) << 12) | (_n << 16) | (1 << (_n + 24))
+# 0-255每个字节中1的个数
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def to_mask(numbers):
+    # 号码位图：第n位表示号码n
+    mask = 0
+    for n in numbers:
+        mask |= 1 << n
+    return mask
+
+
+def from_mask(mask):
+    return [n for n in RED_NUMBERS if mask >> n & 1]
+
+
+class RedBallIndex:
+    """红球组合索引：按(区间比, 奇数个数, 是否连号)分组，组内按(和值, 跨度)排序"""
+
+    def __init__(self, combos):
+        rows = {}
+        feature = _FEATURES.__getitem__
+        for combo in combos:
+            f = sum(map(feature, combo))
+            mask = f >> 24
+            key = (f & 0xFFFF) | (bool(mask & (mask >> 1)) << 16)
+            # 排序键：和值、跨度、号码位图拼成一个整数
+            row = ((f >> 16) & 0xFF) << 40 | (combo[-1] - combo[0]) << 34 | mask
+            group_rows = rows.get(key)
+            if group_rows is None:
+                group_rows = rows[key] = []
+            group_rows.append(row)
+
+        self.codes = array('Q')
+        self.spans = array('B')
+        # offsets[s]为该组内和值>=s的第一个位置（全局下标）
+        self.groups = {}
+        for key, group_rows in rows.items():
+            group_rows.sort()
+            start = len(self.codes)
+            offsets = []
+            position = 0
+            for s in range(MAX_SUM + 2):
+                while position < len(group_rows) and group_rows[position] >> 40 < s:
+                    position += 1
+                offsets.append(start + position)
+            self.codes.extend(row & 0x3FFFFFFFF for row in group_rows)
+            self.spans.extend((row >> 34) & 0x3F for row in group_rows)
+            zones = (key & 0xF, (key >> 4) & 0xF, (key >> 8) & 0xF)
+            self.groups[(zones, (key >> 12) & 0xF, bool(key >> 16))] = offsets
+        self._joint_tables = {}
+
+    @classmethod
+    def from_arrays(cls, codes, spans, groups):
+        # 直接用已排好序的数组构造，供筛选后的索引使用
+        index = cls(())
+        index.codes = codes
+        index.spans = spans
+        index.groups = groups
+        return index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def slices(self, zones, odds, sum_range, consecutive=None, span_range=None):
+        flags = (False, True) if consecutive is None else (consecutive,)
+        start = max(sum_range[0], 0)
+        end = min(sum_range[1], MAX_SUM)
+        slices = []
+        if start > end:
+            return slices
+        for flag in flags:
+            offsets = self.groups.get((tuple(zones), odds, flag))
+            if offsets is None:
+                continue
+            if span_range is None:
+                if offsets[end + 1] > offsets[start]:
+                    slices.append((offsets[start], offsets[end + 1]))
+                continue
+            # 同一和值内按跨度有序，二分取出跨度区间
+            for s in range(start, end + 1):
+                low = bisect_left(self.spans, span_range[0], offsets[s], offsets[s + 1])
+                high = bisect_right(self.spans, span_range[1], offsets[s], offsets[s + 1])
+                if high > low:
+                    slices.append((low, high))
+        return slices
+
+    def count(self, zones, odds, sum_range, consecutive=None, span_range=None):
+        return sum(high - low for low, high in self.slices(zones, odds, sum_range, consecutive, span_range))
+
+    def sample(self, zones, odds, sum_range, consecutive=None, span_range=None, rng=random):
+        # 在所有满足条件的组合中等概率抽取一个，没有则返回None
+        slices = self.slices(zones, odds, sum_range, consecutive, span_range)
+        total = sum(high - low for low, high in slices)
+        if not total:
+            return None
+        r = rng.randrange(total)
+        for low, high in slices:
+            if r < high - low:
+                return from_mask(self.codes[low + r])
+            r -= high - low
+
+    def joint_table(self, zone_table, parity_table, sum_table, consecutive=None, span_table=None):
+        """区间比、奇偶比、和值区间、跨度区间的联合权重，去掉没有任何组合的分组
+        返回([(区间比, 奇偶比, 和值区间, 跨度区间), ...], 累计权重)；span_table为None时跨度不限，跨度区间为None"""
+        cache_key = (
+            tuple(map(tuple, zone_table[0])), tuple(zone_table[1]),
+            tuple(map(tuple, parity_table[0])), tuple(parity_table[1]),
+            tuple(map(tuple, sum_table[0])), tuple(sum_table[1]),
+            consecutive,
+            None if span_table is None else (tuple(map(tuple, span_table[0])), tuple(span_table[1])),
+        )
+        table = self._joint_tables.get(cache_key)
+        if table is not None:
+            return table
+
+        spans = [(None, 1)] if span_table is None else list(zip(*span_table))
+        groups = []
+        cum_weights = []
+        total = 0
+        for zones, zone_weight in zip(*zone_table):
+            for parity, parity_weight in zip(*parity_table):
+                for sum_range, sum_weight in zip(*sum_table):
+                    for span_range, span_weight in spans:
+                        weight = zone_weight * parity_weight * sum_weight * span_weight
+                        if weight <= 0 or not self.count(zones, parity[0], sum_range, consecutive, span_range):
+                            continue
+                        total += weight
+                        groups.append((zones, parity, sum_range, span_range))
+                        cum_weights.append(total)
+        table = (groups, cum_weights)
+        if len(self._joint_tables) >= 16:
+            self._joint_tables.clear()
+        self._joint_tables[cache_key] = table
+        return table
+
+
+def popcount(values):
+    """uint64数组每个元素中1的个数，用于统计与开奖号码的重号个数"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        # NumPy 2.0+ 直接使用硬件popcount
+        return np.bitwise_count(values).astype(np.int8)
+    return _POPCOUNT_TABLE[values.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int8)
+
+
+def overlap_index(index, last_draw, overlap=1):
+    """从已有索引中筛出与上期恰好有overlap个重号的组合，比重新枚举快得多"""
+    codes = np.frombuffer(index.codes, dtype=np.uint64)
+    keep = popcount(codes & np.uint64(to_mask(last_draw))) == overlap
+    # 筛选后各组仍然连续、组内仍按和值有序，偏移量用累计计数换算
+    position = np.concatenate([[0], np.cumsum(keep)])
+    groups = {key: position[offsets].tolist() for key, offsets in index.groups.items()}
+    return RedBallIndex.from_arrays(array('Q', codes[keep].tobytes()),
+                                    array('B', np.frombuffer(index.spans, dtype=np.uint8)[keep].tobytes()),
+                                    groups)
+
+
+# 全量索引只枚举一次，由_full_index_lock保证不会重复构建；各期的索引从全量索引筛出
+_full_index_lock = threading.Lock()
+_index_lock = threading.Lock()
+_indexes = {}
+
+
+def get_index(last_draw=None):
+    """返回红球组合索引；指定上期号码时只包含与上期恰好有一个重号的组合"""
+    key = None if last_draw is None else tuple(sorted(set(last_draw)))
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+    if key is None:
+        with _full_index_lock:
+            index = _indexes.get(None)
+            if index is None:
+                index = _indexes[None] = RedBallIndex(combinations(RED_NUMBERS, 6))
+        return index
+    # 向量化筛选约几十毫秒，不持有锁：新开奖后并发的请求各自筛选，不会排队等待
+    index = overlap_index(get_index(), key)
+    with _index_lock:
+        # 只保留全量索引和最近一期的索引
+        for old_key in [k for k in _indexes if k is not None and k != key]:
+            del _indexes[old_key]
+        index = _indexes.setdefault(key, index)
+    return index
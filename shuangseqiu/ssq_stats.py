@@ -0,0 +1,92 @@
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+from ssq_sampler import SECTIONS
+
+SUM_BUCKET_WIDTH = 10
+# 120期里单个跨度只出现几次，按区间统计，没出现过的跨度不会被排除
+SPAN_BUCKET_WIDTH = 5
+# consecutive只在/stats中展示：/generate硬性排除连号组合，这项比例不参与抽样
+DIMENSIONS = ('interval', 'parity', 'sum', 'span', 'consecutive', 'blue')
+
+
+def draw_features(draws):
+    """一次性用NumPy计算每期的区间比、奇偶比、和值区间、跨度区间、是否连号、蓝球"""
+    if not draws:
+        return []
+    reds = np.sort(np.array([draw['red'] for draw in draws], dtype=np.int16), axis=1)
+    zones = np.stack([((reds >= low) & (reds <= high)).sum(axis=1) for low, high in SECTIONS], axis=1)
+    odds = (reds % 2).sum(axis=1)
+    parities = np.stack([odds, reds.shape[1] - odds], axis=1)
+    sum_low = reds.sum(axis=1) // SUM_BUCKET_WIDTH * SUM_BUCKET_WIDTH
+    span_low = (reds[:, -1] - reds[:, 0]) // SPAN_BUCKET_WIDTH * SPAN_BUCKET_WIDTH
+    consecutive = (np.diff(reds, axis=1) == 1).any(axis=1)
+    blues = np.array([draw['blue'] for draw in draws], dtype=np.int16)
+    return list(zip(
+        map(tuple, zones.tolist()),
+        map(tuple, parities.tolist()),
+        ((low, low + SUM_BUCKET_WIDTH - 1) for low in sum_low.tolist()),
+        ((low, low + SPAN_BUCKET_WIDTH - 1) for low in span_low.tolist()),
+        consecutive.tolist(),
+        ((blue,) for blue in blues.tolist()),
+    ))
+
+
+class StatsEngine:
+    """最近window期开奖的各项分布，新开奖到来时增量更新，不做全量重算"""
+
+    def __init__(self, window=120):
+        self.window = window
+        self._lock = threading.Lock()
+        self._features = deque()  # 窗口内每期的特征，最早的在左边
+        self._counts = {dimension: Counter() for dimension in DIMENSIONS}
+        self._tables = None
+        self.latest_issue = None
+
+    def __len__(self):
+        return len(self._features)
+
+    def load(self, draws):
+        """用开奖记录（最新的在前）重建窗口"""
+        draws = draws[:self.window]
+        features = draw_features(draws)
+        with self._lock:
+            self._features = deque(reversed(features))
+            columns = list(zip(*features)) or [()] * len(DIMENSIONS)
+            self._counts = {dimension: Counter(values) for dimension, values in zip(DIMENSIONS, columns)}
+            self._tables = None
+            self.latest_issue = draws[0]['issue'] if draws else None
+
+    def add_draws(self, draws):
+        """按开奖顺序（最早的在前）追加新开奖，移出窗口外的旧开奖"""
+        for draw, features in zip(draws, draw_features(draws)):
+            with self._lock:
+                self._features.append(features)
+                for dimension, value in zip(DIMENSIONS, features):
+                    self._counts[dimension][value] += 1
+                if len(self._features) > self.window:
+                    for dimension, value in zip(DIMENSIONS, self._features.popleft()):
+                        counter = self._counts[dimension]
+                        counter[value] -= 1
+                        if not counter[value]:
+                            del counter[value]
+                self._tables = None
+                self.latest_issue = draw['issue']
+
+    def tables(self):
+        """各项分布的权重表：{维度: [取值列表, 比例列表]}，取值按大小排序"""
+        with self._lock:
+            if self._tables is None:
+                total = len(self._features)
+                tables = {}
+                for dimension, counter in self._counts.items():
+                    values = sorted(counter)
+                    if dimension in ('interval', 'parity', 'sum', 'span', 'blue'):
+                        items = [list(value) for value in values]
+                    else:
+                        items = values
+                    tables[dimension] = [items, [counter[value] / total for value in values]]
+                self._tables = tables
+            return self._tables
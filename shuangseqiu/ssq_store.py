@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from functools import partial
+
+DRAWS_PATH = "/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=ssq&issueCount=&issueStart=&issueEnd=&dayStart=&dayEnd=&pageNo={page_no}&pageSize={page_size}&week=&systemType=PC"
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ssq_draws.db')
+
+
+def parse_draw(item):
+    # 开奖接口的一条记录 -> (期号, 日期, 红球, 蓝球)
+    red = ','.join(str(int(ball)) for ball in item['red'].split(','))
+    return item['code'], item['date'][:10], red, int(item['blue'])
+
+
+def fetch_draw_page(page_no, page_size=100, fixture_dir=None):
+    """获取一页开奖记录（最新的在前），fixture_dir不为空时读取本地draws.json"""
+    if fixture_dir:
+        if page_no > 1:
+            return []
+        with open(os.path.join(fixture_dir, 'draws.json'), encoding='utf-8') as f:
+            return json.load(f)['result']
+    import ssq_http
+    response = ssq_http.get(ssq_http.CWL_BASE + DRAWS_PATH.format(page_no=page_no, page_size=page_size))
+    response.raise_for_status()
+    return response.json()['result']
+
+
+class DrawStore:
+    """本地开奖历史库（SQLite），保存期号、日期、红球、蓝球"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS draws ('
+                         'issue TEXT PRIMARY KEY, date TEXT NOT NULL, red TEXT NOT NULL, blue INTEGER NOT NULL)')
+
+    def _connect(self):
+        # 每次操作单独连接，多线程下无需共享连接
+        return sqlite3.connect(self.path)
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM draws').fetchone()[0]
+
+    def latest_issue(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT MAX(issue) FROM draws').fetchone()[0]
+
+    def add_draws(self, items):
+        rows = [parse_draw(item) for item in items]
+        with closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO draws (issue, date, red, blue) VALUES (?, ?, ?, ?)', rows)
+            return conn.total_changes - before
+
+    def recent_draws(self, limit=None):
+        """最近limit期开奖（最新的在前），每期为{'issue', 'date', 'red', 'blue'}"""
+        sql = 'SELECT issue, date, red, blue FROM draws ORDER BY issue DESC'
+        params = ()
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params = (limit,)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{'issue': issue, 'date': date, 'red': [int(ball) for ball in red.split(',')], 'blue': blue}
+                for issue, date, red, blue in rows]
+
+    def latest_draw(self):
+        draws = self.recent_draws(1)
+        return draws[0] if draws else None
+
+    def sync(self, fetch_page=fetch_draw_page, page_size=100, max_pages=100):
+        """只拉取比本地最新期号更新的开奖记录，返回新增期数"""
+        latest = self.latest_issue()
+        added = 0
+        for page_no in range(1, max_pages + 1):
+            items = fetch_page(page_no, page_size)
+            new_items = [item for item in items if latest is None or item['code'] > latest]
+            added += self.add_draws(new_items)
+            # 翻到已有期号或最后一页就停止
+            if len(new_items) < len(items) or len(items) < page_size:
+                break
+        if added:
+            logging.info(f"同步开奖数据完成，新增 {added} 期")
+        return added
+
+    def import_json(self, json_file):
+        # 从开奖接口格式的JSON文件导入，用于离线初始化
+        with open(json_file, encoding='utf-8') as f:
+            return self.add_draws(json.load(f)['result'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = DrawStore(os.environ.get('SSQ_DB_PATH', DEFAULT_DB_PATH))
+    if len(sys.argv) == 3 and sys.argv[1] == 'import':
+        print(f"导入 {store.import_json(sys.argv[2])} 期")
+    elif len(sys.argv) == 2 and sys.argv[1] == 'sync':
+        fetch_page = partial(fetch_draw_page, fixture_dir=os.environ.get('SSQ_FIXTURE_DIR'))
+        print(f"新增 {store.sync(fetch_page)} 期")
+    else:
+        print("用法: python ssq_store.py sync | import <draws.json>")
+        sys.exit(1)
+    print(f"本地共 {store.count()} 期，最新期号 {store.latest_issue()}")
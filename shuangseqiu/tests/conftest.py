@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def ssq_app(tmp_path_factory):
+    """离线模式下的shuangseqiu模块：上游页面用ssq_bench.make_fixtures生成，开奖历史导入临时库"""
+    fixture_dir = tmp_path_factory.mktemp('fixtures')
+    db_path = tmp_path_factory.mktemp('db') / 'ssq.db'
+    from ssq_bench import make_fixtures
+    make_fixtures(str(fixture_dir))
+    # 必须在导入shuangseqiu之前设置
+    os.environ.update({'SSQ_FIXTURE_DIR': str(fixture_dir), 'SSQ_DB_PATH': str(db_path), 'SSQ_OFFLINE': '1'})
+    import shuangseqiu
+    shuangseqiu.draw_store.import_json(str(fixture_dir / 'draws.json'))
+    shuangseqiu.stats_engine.load(shuangseqiu.draw_store.recent_draws(shuangseqiu.STATS_WINDOW))
+    return shuangseqiu
+
+
+@pytest.fixture
+def client(ssq_app):
+    ssq_app.app.config['TESTING'] = True
+    return ssq_app.app.test_client()
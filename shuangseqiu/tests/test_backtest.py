@@ -0,0 +1,36 @@
+import random
+
+import numpy as np
+
+from ssq_backtest import TIER_NAMES, backtest, score_tickets
+from ssq_sampler import get_index, to_mask
+
+DRAW = {'red': [1, 2, 3, 4, 5, 6], 'blue': 7}
+
+
+def test_prize_tiers():
+    # (红球命中数, 蓝球是否命中) -> 奖级
+    expected = {
+        (6, True): '一等奖', (6, False): '二等奖', (5, True): '三等奖',
+        (5, False): '四等奖', (4, True): '四等奖', (4, False): '五等奖', (3, True): '五等奖',
+        (2, True): '六等奖', (1, True): '六等奖', (0, True): '六等奖',
+        (3, False): '未中奖', (2, False): '未中奖', (1, False): '未中奖', (0, False): '未中奖',
+    }
+    for (red_hits, blue_hit), tier in expected.items():
+        red = list(range(1, red_hits + 1)) + list(range(20, 26 - red_hits))
+        codes = np.array([to_mask(red)], dtype=np.uint64)
+        blue_balls = np.array([[7 if blue_hit else 8]])
+        counts = score_tickets(codes, blue_balls, DRAW)
+        assert TIER_NAMES[int(counts.argmax())] == tier and counts.sum() == 1, (red_hits, blue_hit)
+
+
+def test_backtest_is_reproducible_across_worker_counts():
+    # 先在本进程构建全量索引，fork出的回测进程直接继承，不用各自构建
+    get_index()
+    rng = random.Random(0)
+    draws = [{'issue': str(2024000 + i), 'date': '2024-01-01', 'red': sorted(rng.sample(range(1, 34), 6)),
+              'blue': rng.randint(1, 16)} for i in range(30)]
+    reports = [backtest(draws, 500, window=20, workers=workers, seed=5) for workers in (1, 2)]
+    assert reports[0]['variants'] == reports[1]['variants']
+    assert backtest(draws, 500, window=20, variants=('full',), workers=2, seed=5)['variants']['full'] \
+        == reports[0]['variants']['full']
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from ssq_cache import TTLCache
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.005)
+
+
+def test_hit_and_miss():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get('key', loader) == 'value'
+    assert cache.get('key', loader) == 'value'
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['keys'] == 1
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('key', loader))) for _ in range(8)]
+    threads[0].start()
+    started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    # 其余线程都进入等待后再放行加载
+    wait_for(lambda: cache.stats()['coalesced'] == 7)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_stale_value_returned_while_refreshing():
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    values = iter(['old', 'new'])
+    release = threading.Event()
+
+    def loader():
+        value = next(values)
+        if value == 'new':
+            release.wait(2)
+        return value
+
+    assert cache.get('key', loader) == 'old'
+    time.sleep(0.06)
+    # 过期后立即返回旧值，后台刷新还没完成时也不阻塞
+    assert cache.get('key', loader) == 'old'
+    assert cache.get('key', loader) == 'old'
+    release.set()
+    wait_for(lambda: cache.stats()['refreshes'] == 1)
+
+    assert cache.get('key', loader) == 'new'
+    stats = cache.stats()
+    assert stats['stale_hits'] == 2
+    assert stats['misses'] == 1
+
+
+def test_errors_are_not_cached():
+    cache = TTLCache(ttl=60)
+    outcomes = iter([RuntimeError('upstream down'), 'value'])
+
+    def loader():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with pytest.raises(RuntimeError):
+        cache.get('key', loader)
+    assert cache.get('key', loader) == 'value'
+    stats = cache.stats()
+    assert stats['errors'] == 1
+    assert stats['misses'] == 2
+    assert stats['keys'] == 1
+
+
+def test_load_started_before_invalidate_is_not_stored():
+    cache = TTLCache(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+    values = iter(['old', 'new'])
+
+    def loader():
+        value = next(values)
+        if value == 'old':
+            started.set()
+            release.wait(2)
+        return value
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(cache.get('key', loader)))
+    thread.start()
+    started.wait(2)
+    cache.invalidate()
+    # invalidate之后的调用不再等待旧的加载
+    assert cache.get('key', loader) == 'new'
+    release.set()
+    thread.join(2)
+
+    # 旧加载的调用方仍拿到结果，但不会覆盖新值
+    assert results == ['old']
+    assert cache.get('key', loader) == 'new'
+    assert cache.stats()['discarded'] == 1
+
+
+def test_background_refresh_started_before_invalidate_is_not_stored():
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+    values = iter(['old', 'new'])
+
+    def loader():
+        if threading.current_thread() is not threading.main_thread():
+            # 后台刷新
+            started.set()
+            release.wait(2)
+            return 'stale refresh'
+        return next(values)
+
+    assert cache.get('key', loader) == 'old'
+    time.sleep(0.06)
+    assert cache.get('key', loader) == 'old'
+    started.wait(2)
+    cache.invalidate('key')
+    assert cache.get('key', loader) == 'new'
+    release.set()
+    wait_for(lambda: cache.stats()['discarded'] == 1)
+
+    assert cache.get('key', loader) == 'new'
+    assert cache.stats()['refreshes'] == 0
@@ -0,0 +1,47 @@
+import numpy as np
+
+import ssq_batch
+from ssq_rng import TicketRng
+
+
+def test_generate_offline(client):
+    response = client.get('/generate?seed=7')
+    assert response.status_code == 200
+    assert response.headers['X-Seed'] == '7'
+    tickets = response.get_json()
+    assert len(tickets) == 10
+    for ticket in tickets:
+        assert len(ticket['red_balls']) == 6
+        assert all(1 <= ball <= 33 for ball in ticket['red_balls'])
+        assert len(ticket['common_elements']) == 1
+        assert ticket['total_sum'] == sum(ticket['red_balls'])
+
+    # 同一个种子结果可以复现
+    assert client.get('/generate?seed=7').get_json() == tickets
+
+
+def test_generate_batch(client):
+    response = client.get('/generate?count=5&seed=3')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 5
+
+
+def test_generate_rejects_bad_arguments(client):
+    assert client.get('/generate?seed=abc').status_code == 400
+    assert client.get('/generate?count=0').status_code == 400
+
+
+def test_generate_parallel_is_deterministic_across_workers(ssq_app, monkeypatch):
+    # 分片改小，几百注就能拆成多个分片
+    monkeypatch.setattr(ssq_batch, 'SHARD_SIZE', 64)
+    interval_data, parity_data = ssq_app.get_interval_parity_data()
+    args = (300, interval_data, parity_data, ssq_app.get_blue_data())
+    kwargs = {'index': ssq_app.get_index(ssq_app.get_red_balls()), 'consecutive': False,
+              'sum_table': ssq_app.get_sum_table(), 'span_table': ssq_app.get_span_table()}
+    batches = [ssq_batch.generate_parallel(*args, ticket_rng=TicketRng(11), workers=workers, **kwargs)
+               for workers in (1, 2, 4)]
+    for batch in batches[1:]:
+        assert batch.keys() == batches[0].keys()
+        assert all(np.array_equal(batch[key], batches[0][key]) for key in batch)
+    other = ssq_batch.generate_parallel(*args, ticket_rng=TicketRng(12), workers=2, **kwargs)
+    assert not np.array_equal(other['red_balls'], batches[0]['red_balls'])
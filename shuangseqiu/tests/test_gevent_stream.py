@@ -0,0 +1,69 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('gevent')
+pytest.importorskip('gunicorn')
+requests = pytest.importorskip('requests')
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 比线程模式的默认上限（8）多，单个gevent worker也要同时服务
+CLIENTS = 24
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def gunicorn_url(tmp_path_factory):
+    fixture_dir = tmp_path_factory.mktemp('gunicorn_fixtures')
+    from ssq_bench import make_fixtures
+    make_fixtures(str(fixture_dir))
+    port = free_port()
+    env = dict(os.environ, SSQ_FIXTURE_DIR=str(fixture_dir), SSQ_OFFLINE='1',
+               SSQ_DB_PATH=str(tmp_path_factory.mktemp('gunicorn_db') / 'ssq.db'),
+               SSQ_BIND=f'127.0.0.1:{port}', SSQ_WORKERS='1')
+    env.pop('SSQ_MAX_STREAMS', None)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'shuangseqiu:app'], cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(100):
+            try:
+                requests.get(url + '/cache/stats', timeout=10)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        else:
+            pytest.fail('gunicorn没有启动')
+        yield url
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def test_gevent_worker_serves_concurrent_streams(gunicorn_url):
+    # 所有流同时保持打开：每个客户端先读一行再等其他客户端，线程模式下第9个起会被拒绝或卡住
+    def open_stream(_):
+        response = requests.get(gunicorn_url + '/generate/stream?count=1000000&budget=20&seed=1',
+                                stream=True, timeout=10)
+        return response, json.loads(next(response.iter_lines()))
+
+    with ThreadPoolExecutor(CLIENTS) as pool:
+        streams = list(pool.map(open_stream, range(CLIENTS)))
+    try:
+        assert all(response.status_code == 200 for response, _ in streams)
+        assert all(len(first['red_balls']) == 6 for _, first in streams)
+    finally:
+        for response, _ in streams:
+            response.close()
+    assert requests.get(gunicorn_url + '/generate/stream?count=5', timeout=10).status_code == 200
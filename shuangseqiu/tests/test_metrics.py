@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+import ssq_http
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def test_metrics_after_upstream_error_and_success(client, monkeypatch):
+    outcomes = iter([requests.ConnectionError('boom'), FakeResponse()])
+
+    def fake_get(url, **kwargs):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(ssq_http.session, 'get', fake_get)
+    with pytest.raises(requests.ConnectionError):
+        ssq_http.get('http://upstream.test/a')
+    ssq_http.get('http://upstream.test/b')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'ssq_upstream_requests_total{host="upstream.test",status="error"} 1' in body
+    assert 'ssq_upstream_requests_total{host="upstream.test",status="200"} 1' in body
+    assert 'ssq_upstream_request_seconds_count{host="upstream.test"} 2' in body
+
+
+def test_metrics_count_upstream_retries(client):
+    statuses = iter([503, 200])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(next(statuses))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f'127.0.0.1:{server.server_port}'
+    try:
+        assert ssq_http.get(f'http://{host}/retry').status_code == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert f'ssq_upstream_retries_total{{host="{host}",reason="503"}} 1' in body
+    assert f'ssq_upstream_requests_total{{host="{host}",status="200"}} 1' in body
@@ -0,0 +1,37 @@
+import pytest
+
+from ssq_parser import LayoutError, parse_trend_stream, parse_trend_table
+
+# 与走势页相同的嵌套：/html/body/div[2]/div/div/div[2]/div[2]/table/tbody[1]
+PAGE = ('<html><body><div>header</div><div><div><div><div>menu</div><div><div>tabs</div><div>'
+        '<table><tbody>{rows}</tbody><tbody><tr><td>出现次数</td><td>9</td><td>9</td></tr></tbody></table>'
+        '</div></div></div></div></div></body></html>')
+ROWS = '<tr><td>2024001</td><td>2:2:2</td><td>3:3</td></tr><tr><td>2024002</td><td>1:3:2</td><td>4:2</td></tr>'
+# 改版后走势表外多了一层div
+MOVED_PAGE = PAGE.replace('<div><div>tabs</div>', '<div><div><div>tabs</div>').replace('</body>', '</div></body>')
+
+
+def parse_both(page, columns):
+    data = page.encode('utf-8')
+    chunks = (data[i:i + 64] for i in range(0, len(data), 64))
+    return parse_trend_table(data, columns), parse_trend_stream(chunks, columns)
+
+
+def test_parses_first_tbody_only():
+    for rows in parse_both(PAGE.format(rows=ROWS), (2, 3)):
+        assert rows == [('2:2:2', '3:3'), ('1:3:2', '4:2')]
+
+
+def test_moved_table_raises_layout_error():
+    with pytest.raises(LayoutError):
+        parse_trend_table(MOVED_PAGE.format(rows=ROWS), (2, 3))
+    with pytest.raises(LayoutError):
+        parse_trend_stream([MOVED_PAGE.format(rows=ROWS).encode('utf-8')], (2, 3))
+
+
+def test_unexpected_cell_raises_layout_error():
+    page = PAGE.format(rows=ROWS.replace('1:3:2', '一比三'))
+    with pytest.raises(LayoutError, match='第2行'):
+        parse_trend_table(page, (2, 3))
+    with pytest.raises(LayoutError, match='第2行'):
+        parse_trend_stream([page.encode('utf-8')], (2, 3))
@@ -0,0 +1,43 @@
+import random
+from math import comb
+
+import numpy as np
+
+import ssq_sampler
+
+LAST_DRAW = [3, 8, 14, 21, 27, 33]
+
+
+def test_period_index_is_derived_from_full_index():
+    full = ssq_sampler.get_index()
+    index = ssq_sampler.get_index(LAST_DRAW)
+    assert len(full) == comb(33, 6)
+    assert len(index) == 6 * comb(27, 5)
+    codes = np.frombuffer(index.codes, dtype=np.uint64)
+    assert (ssq_sampler.popcount(codes & np.uint64(ssq_sampler.to_mask(LAST_DRAW))) == 1).all()
+    # 同一期再次获取直接返回缓存，顺序不同的号码视为同一期
+    assert ssq_sampler.get_index(LAST_DRAW[::-1]) is index
+    assert ssq_sampler.get_index() is full
+
+
+def test_period_index_samples_satisfy_constraints():
+    index = ssq_sampler.get_index(LAST_DRAW)
+    numbers = index.sample((2, 2, 2), 3, (90, 109), consecutive=False, rng=random.Random(0))
+    assert len(set(numbers) & set(LAST_DRAW)) == 1
+    assert sum(n % 2 for n in numbers) == 3 and 90 <= sum(numbers) <= 109
+    assert all(b - a > 1 for a, b in zip(numbers, numbers[1:]))
+    assert [sum(low <= n <= high for n in numbers) for low, high in ssq_sampler.SECTIONS] == [2, 2, 2]
+
+
+def test_span_table_limits_generated_spans(ssq_app):
+    from ssq_batch import generate_batch
+
+    (interval_data, parity_data), blue_data = ssq_app.get_interval_parity_data(), ssq_app.get_blue_data()
+    batch = generate_batch(2000, interval_data, parity_data, blue_data, index=ssq_app.get_index(LAST_DRAW),
+                           consecutive=False, sum_table=ssq_app.get_sum_table(), rng=np.random.default_rng(0),
+                           span_table=[[[20, 24], [25, 29]], [0.5, 0.5]])
+    assert ((batch['span'] >= 20) & (batch['span'] <= 29)).all()
+
+    # 统计引擎按区间给出跨度分布，/generate按它抽样
+    spans, weights = ssq_app.get_span_table()
+    assert all(high - low == 4 for low, high in spans) and abs(sum(weights) - 1) < 1e-9
@@ -0,0 +1,19 @@
+def test_stats_conditional_requests(client, ssq_app):
+    response = client.get('/stats')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    assert etag == f'"{ssq_app.stats_engine.latest_issue}-{ssq_app.STATS_WINDOW}"'
+    assert 'max-age' in response.headers['Cache-Control']
+    assert response.get_json()['issue'] == ssq_app.stats_engine.latest_issue
+
+    # 版本没变时返回304且不带响应体
+    not_modified = client.get('/stats', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert client.get('/stats', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    # ETag不匹配时即使带了If-Modified-Since也返回完整结果
+    assert client.get('/stats', headers={'If-None-Match': '"stale"',
+                                         'If-Modified-Since': last_modified}).status_code == 200
+    assert client.get('/stats', headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
@@ -0,0 +1,43 @@
+from ssq_store import DrawStore
+
+
+def _item(issue):
+    return {'code': str(issue), 'date': '2024-01-01(一)', 'red': '01,02,03,04,05,06', 'blue': '07'}
+
+
+class FakeUpstream:
+    """按页返回开奖记录（最新的在前），记录请求过的页码"""
+
+    def __init__(self, latest, total):
+        self.items = [_item(latest - i) for i in range(total)]
+        self.pages = []
+
+    def __call__(self, page_no, page_size):
+        self.pages.append(page_no)
+        return self.items[(page_no - 1) * page_size:page_no * page_size]
+
+
+def test_sync_from_empty_fetches_until_last_page(tmp_path):
+    store = DrawStore(str(tmp_path / 'draws.db'))
+    upstream = FakeUpstream(2024100, 25)
+    assert store.sync(upstream, page_size=10) == 25
+    assert upstream.pages == [1, 2, 3]
+    assert store.latest_issue() == '2024100'
+
+
+def test_sync_stops_at_first_page_with_known_issue(tmp_path):
+    store = DrawStore(str(tmp_path / 'draws.db'))
+    store.add_draws([_item(2024100 - i) for i in range(50)])
+    upstream = FakeUpstream(2024112, 100)
+    assert store.sync(upstream, page_size=10) == 12
+    # 第2页出现已有期号后不再翻页
+    assert upstream.pages == [1, 2]
+    assert store.count() == 62 and store.latest_issue() == '2024112'
+
+
+def test_sync_up_to_date_fetches_one_page(tmp_path):
+    store = DrawStore(str(tmp_path / 'draws.db'))
+    store.add_draws([_item(2024100)])
+    upstream = FakeUpstream(2024100, 100)
+    assert store.sync(upstream, page_size=10) == 0
+    assert upstream.pages == [1]
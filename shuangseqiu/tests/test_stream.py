@@ -0,0 +1,56 @@
+import json
+
+
+def free_slots(ssq_app):
+    return ssq_app.stream_slots._value
+
+
+def test_stream_releases_slot_when_finished(client, ssq_app):
+    before = free_slots(ssq_app)
+    response = client.get('/generate/stream?count=300&seed=1')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1] == {"done": True, "count": 300, "reason": "count"}
+    response.close()
+    assert free_slots(ssq_app) == before
+
+
+def test_stream_releases_slot_when_closed_early(client, ssq_app):
+    before = free_slots(ssq_app)
+    response = client.get('/generate/stream?count=100000', buffered=False)
+    assert response.status_code == 200
+    assert free_slots(ssq_app) == before - 1
+    next(response.response)
+    response.close()
+    assert free_slots(ssq_app) == before
+
+
+def test_stream_releases_slot_when_closed_before_start(ssq_app):
+    # 服务器在开始迭代前就关闭响应时，生成器的finally不会执行
+    before = free_slots(ssq_app)
+    with ssq_app.app.test_request_context('/generate/stream?count=100000'):
+        ssq_app.app.preprocess_request()
+        response = ssq_app.generate_stream()
+    assert free_slots(ssq_app) == before - 1
+    response.close()
+    assert free_slots(ssq_app) == before
+
+
+def test_stream_rejected_when_all_slots_busy(client, ssq_app):
+    held = 0
+    while ssq_app.stream_slots.acquire(blocking=False):
+        held += 1
+    try:
+        response = client.get('/generate/stream?count=10')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        for _ in range(held):
+            ssq_app.stream_slots.release()
+    assert client.get('/generate/stream?count=10').status_code == 200
+
+
+def test_stream_rejects_malformed_arguments(client):
+    assert client.get('/generate/stream?count=abc').status_code == 400
+    assert client.get('/generate/stream?budget=xyz').status_code == 400
+    assert client.get('/generate/stream?count=0').status_code == 400